@@ -0,0 +1,188 @@
+"""
+Скорость и точность конвейера на размеченных изображениях из img/
+
+Запуск из корня репозитория:
+    python -m benchmarks.accuracy -o report.json
+    python -m benchmarks.accuracy --baseline report.json
+
+Отчёт в JSON удобно сравнивать между коммитами. С --baseline код возврата 1,
+если точность по номерам или символам упала относительно сохранённого отчёта.
+"""
+import argparse
+import json
+import resource
+import sys
+import time
+from typing import Any
+
+import numpy as np
+
+from src.carnum import ColorLocalizer, Pipeline, PlatePrescreen
+from src.carnum.plate_format import load_plate_formats
+
+from .common import char_matches, load_manifest
+
+QUANTILES = (50, 95, 99)
+
+
+def latency_summary(samples: dict[str, list[float]]) -> dict[str, dict[str, float]]:
+    """
+    Квантили времени по этапам, миллисекунды
+    """
+    summary = {}
+    for stage, values in samples.items():
+        ms = np.asarray(values) * 1000
+        summary[stage] = {f'p{q}': round(float(np.percentile(ms, q)), 3) for q in QUANTILES}
+        summary[stage]['mean'] = round(float(ms.mean()), 3)
+    return summary
+
+
+def peak_rss_mb() -> float:
+    # В Linux ru_maxrss в килобайтах, в macOS — в байтах
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2 ** 20 if sys.platform == 'darwin' else rss / 2 ** 10
+
+
+def confidence_summary(images: list[dict[str, Any]]) -> dict[str, float | None]:
+    """
+    Средняя уверенность верно и неверно прочитанных номеров: чем больше разрыв,
+    тем надёжнее порог min_confidence отделяет ошибки
+    """
+    summary: dict[str, float | None] = {}
+    for key, correct in (('correct', True), ('wrong', False)):
+        values = [
+            image['confidence'] for image in images
+            if image['confidence'] is not None and (image['number'] == image['expected']) == correct
+        ]
+        summary[key] = round(float(np.mean(values)), 4) if values else None
+    return summary
+
+
+def run(manifest: str, repeat: int, pipeline: Pipeline) -> dict[str, Any]:
+    labels = load_manifest(manifest)
+    samples: dict[str, list[float]] = {}
+    counters: dict[str, int] = {}
+    images: list[dict[str, Any]] = []
+    plates_correct = chars_correct = chars_total = 0
+
+    start = time.perf_counter()
+    for path, expected in labels:
+        for _ in range(repeat):
+            image_start = time.perf_counter()
+            result = pipeline.process_file(path)
+            samples.setdefault('total', []).append(time.perf_counter() - image_start)
+            for stage, seconds in result.timings.items():
+                samples.setdefault(stage, []).append(seconds)
+        for name, value in result.counters.items():
+            counters[name] = counters.get(name, 0) + value
+
+        number = result.number or ''
+        matched = char_matches(number, expected)
+        plates_correct += number == expected
+        chars_correct += matched
+        chars_total += len(expected)
+        images.append({
+            'path': path,
+            'expected': expected,
+            'number': number,
+            'chars_correct': matched,
+            'confidence': round(result.confidence, 4) if result.confidence is not None else None,
+            'format': result.format,
+            'error': result.error,
+        })
+    elapsed = time.perf_counter() - start
+
+    return {
+        'manifest': manifest,
+        'repeat': repeat,
+        'images': len(labels),
+        'images_per_sec': round(len(labels) * repeat / elapsed, 3) if elapsed else 0.0,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'accuracy': {
+            'plate': round(plates_correct / len(labels), 4) if labels else 0.0,
+            'char': round(chars_correct / chars_total, 4) if chars_total else 0.0,
+            'plates_correct': plates_correct,
+            'chars_correct': chars_correct,
+            'chars_total': chars_total,
+        },
+        'latency_ms': latency_summary(samples),
+        'confidence': confidence_summary(images),
+        # Средние значения счётчиков на изображение (контуры, кандидаты, символы, ...)
+        'counters': {name: round(value / len(labels), 2) for name, value in sorted(counters.items())},
+        'results': images,
+    }
+
+
+def compare(report: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """
+    Список регрессий точности относительно baseline
+    """
+    regressions = []
+    for key in ('plate', 'char'):
+        old, new = baseline['accuracy'][key], report['accuracy'][key]
+        if new < old - tolerance:
+            regressions.append(f'точность {key}: {old:.1%} -> {new:.1%}')
+
+    old_results = {r['path']: r for r in baseline.get('results', [])}
+    for r in report['results']:
+        old = old_results.get(r['path'])
+        if old is not None and old['number'] == old['expected'] and r['number'] != r['expected']:
+            regressions.append(f'{r["path"]}: {old["number"]} -> {r["number"] or "-"}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--manifest', default='img/labels.csv')
+    parser.add_argument('--repeat', type=int, default=3, help='прогонов каждого изображения для замера времени')
+    parser.add_argument('-o', '--output', help='куда записать отчёт в JSON (по умолчанию stdout)')
+    parser.add_argument('--baseline', help='отчёт предыдущего прогона для проверки регрессий точности')
+    parser.add_argument('--tolerance', type=float, default=0.0, help='допустимое падение точности (доля)')
+    parser.add_argument('--templates', default='img/templates')
+    parser.add_argument('--letters', choices=['template', 'tesseract'], default='template')
+    parser.add_argument('--coarse-to-fine', action='store_true')
+    parser.add_argument('--color-rois', action='store_true')
+    parser.add_argument('--prescreen', type=int, choices=[2, 4, 8], default=None)
+    parser.add_argument('--prescreen-min-regions', type=int, default=1)
+    parser.add_argument('--min-confidence', type=float, default=None)
+    parser.add_argument('--formats', default='ru', help='форматы номеров через запятую')
+    parser.add_argument('--threads', type=int, default=0, help='потоков общего пула (0 — последовательно)')
+    args = parser.parse_args()
+
+    pipeline = Pipeline(
+        templates_dir=args.templates,
+        letter_backend=args.letters,
+        coarse_to_fine=args.coarse_to_fine,
+        localizer=ColorLocalizer() if args.color_rois else None,
+        prescreen=PlatePrescreen(args.prescreen, args.prescreen_min_regions) if args.prescreen else None,
+        min_confidence=args.min_confidence,
+        formats=load_plate_formats(args.formats.split(',')),
+        threads=args.threads,
+    )
+    report = run(args.manifest, max(1, args.repeat), pipeline)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    accuracy = report['accuracy']
+    print(
+        f'{report["images_per_sec"]:.2f} изобр./с, номера {accuracy["plate"]:.1%}, '
+        f'символы {accuracy["char"]:.1%}, пик RSS {report["peak_rss_mb"]:.0f} МБ',
+        file=sys.stderr,
+    )
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f'РЕГРЕССИЯ: {line}', file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+import csv
+import time
+
+import cv2
+from cv2.typing import MatLike
+
+from src.carnum import CharSegmenter, NumberDetector
+
+
+def load_manifest(path: str = 'img/labels.csv') -> list[tuple[str, str]]:
+    """
+    Читает разметку: путь к изображению и правильный номер латиницей
+    """
+    with open(path, encoding='utf-8', newline='') as f:
+        return [(row['path'], row['number']) for row in csv.DictReader(f)]
+
+
+def crop_plate(path: str) -> MatLike | None:
+    """
+    Вырезка лучшего кандидата в номер (как в Pipeline без проверки формата)
+    """
+    img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    assert img is not None, f'file could not be read: {path}'
+
+    detector = NumberDetector(img)
+    candidate = detector.detect_number()
+    if candidate is None:
+        return None
+
+    return detector.crop_number(candidate)
+
+
+def segment_plate(path: str) -> list[MatLike]:
+    number_img = crop_plate(path)
+    if number_img is None:
+        return []
+
+    return CharSegmenter(number_img).segment_characters()
+
+
+def char_matches(predicted: str, expected: str) -> int:
+    return sum(p == e for p, e in zip(predicted, expected))
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
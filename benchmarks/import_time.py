@@ -0,0 +1,68 @@
+"""
+Время холодного импорта для безголового рабочего процесса (python -X importtime)
+
+Запуск из корня репозитория: python -m benchmarks.import_time --budget-ms 50
+Бюджет — собственное время модулей, которых нет в импорте --baseline (cv2 и NumPy):
+их импорт занимает от 100 мс до 1 с в зависимости от кэша диска и не зависит от пакета.
+Код возврата 1, если пакет добавляет больше бюджета или тянет GUI-зависимости.
+"""
+import argparse
+import subprocess
+import sys
+
+FORBIDDEN = ('PySide6', 'matplotlib', 'pytesseract')
+
+
+def measure(statement: str) -> dict[str, tuple[int, int]]:
+    """
+    Модуль -> (собственное время, суммарное время) в микросекундах
+    """
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        capture_output=True, text=True, check=True,
+    )
+    modules: dict[str, tuple[int, int]] = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix('import time:').split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--statement', default='from src.carnum import NumberDetector')
+    parser.add_argument('--baseline', default='import cv2, numpy', help='импорт, время которого не входит в бюджет')
+    # Пакет поверх cv2 и NumPy добавляет около 15 мс; бюджет оставляет запас на медленные диски
+    parser.add_argument('--budget-ms', type=float, default=50)
+    parser.add_argument('--top', type=int, default=10, help='сколько самых медленных модулей показать')
+    args = parser.parse_args()
+
+    modules = measure(args.statement)
+    baseline = measure(args.baseline)
+    total_ms = sum(self_us for self_us, _ in modules.values()) / 1000
+    baseline_ms = sum(self_us for self_us, _ in baseline.values()) / 1000
+    # Модули, которые грузит только проверяемый импорт: пакет и его собственные зависимости
+    extra = {name: times for name, times in modules.items() if name not in baseline}
+    extra_ms = sum(self_us for self_us, _ in extra.values()) / 1000
+    forbidden = sorted(name for name in modules if name.split('.')[0] in FORBIDDEN)
+
+    print(f'{args.statement}: {total_ms:.1f} мс, модулей: {len(modules)}')
+    print(f'{args.baseline}: {baseline_ms:.1f} мс, сверх него: {extra_ms:.1f} мс, модулей: {len(extra)}')
+    for name, (self_us, cumulative_us) in sorted(extra.items(), key=lambda m: -m[1][0])[:args.top]:
+        print(f'  {self_us / 1000:8.1f} мс  {cumulative_us / 1000:8.1f} мс  {name}')
+
+    failed = False
+    if forbidden:
+        print(f'ОШИБКА: импортированы GUI/OCR-зависимости: {", ".join(forbidden)}')
+        failed = True
+    if extra_ms > args.budget_ms:
+        print(f'ОШИБКА: импорт сверх {args.baseline!r} дольше бюджета {args.budget_ms:.0f} мс')
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Задержка обработки одного изображения: последовательно и с общим пулом потоков
+
+Запуск из корня репозитория:
+    python -m benchmarks.latency
+    python -m benchmarks.latency --threads 2 4 --repeat 5
+
+Для каждого режима (весь кадр, области интереса ColorLocalizer, coarse-to-fine
+и, если tesseract есть в PATH, буквы через Tesseract) выводятся p50/p95 времени
+на изображение и ускорение p50 относительно последовательной обработки.
+Ускорение ограничено числом ядер: на одном ядре потоки только добавляют накладные расходы.
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from typing import Any
+
+import numpy as np
+
+from src.carnum import ColorLocalizer, Pipeline
+
+from .common import load_manifest
+
+MODES: dict[str, dict[str, Any]] = {
+    'full_frame': {},
+    'color_rois': {'localizer': ColorLocalizer()},
+    'coarse_to_fine': {'coarse_to_fine': True},
+}
+
+
+def measure(paths: list[str], repeat: int, pipeline: Pipeline) -> tuple[np.ndarray, list[str | None]]:
+    """
+    Время на изображение (мс, все повторы) и прочитанные номера
+    """
+    samples, numbers = [], []
+    for path in paths:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = pipeline.process_file(path)
+            samples.append((time.perf_counter() - start) * 1000)
+        numbers.append(result.number)
+    return np.array(samples), numbers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--manifest', default='img/labels.csv')
+    parser.add_argument('--repeat', type=int, default=3, help='прогонов каждого изображения')
+    parser.add_argument('--threads', type=int, nargs='+', default=[2, 4], help='размеры пула для сравнения')
+    args = parser.parse_args()
+
+    modes = dict(MODES)
+    if shutil.which('tesseract'):
+        modes['tesseract_letters'] = {'letter_backend': 'tesseract'}
+
+    paths = [path for path, _ in load_manifest(args.manifest)]
+    report: dict[str, Any] = {'cpus': os.cpu_count(), 'images': len(paths), 'repeat': args.repeat, 'modes': {}}
+    for mode, params in modes.items():
+        rows = {}
+        baseline_p50, baseline_numbers = None, None
+        for threads in [0, *args.threads]:
+            pipeline = Pipeline(collect_metrics=False, threads=threads, **params)
+            # Прогрев: банк шаблонов, пул потоков и ленивые импорты не должны попасть в замер
+            pipeline.process_file(paths[0])
+            samples, numbers = measure(paths, max(1, args.repeat), pipeline)
+            p50 = float(np.percentile(samples, 50))
+            if baseline_p50 is None:
+                baseline_p50, baseline_numbers = p50, numbers
+            rows[threads] = {
+                'p50_ms': round(p50, 3),
+                'p95_ms': round(float(np.percentile(samples, 95)), 3),
+                'speedup_p50': round(baseline_p50 / p50, 3) if p50 else 0.0,
+                'same_numbers': numbers == baseline_numbers,
+            }
+        report['modes'][mode] = rows
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Сравнение бэкендов распознавания букв (шаблоны против Tesseract) на img/
+
+Запуск из корня репозитория: python -m benchmarks.letters
+"""
+import argparse
+import shutil
+
+from src.carnum import CharRecognizer
+from src.carnum import get_template_bank
+from src.carnum.plate_format import LETTER, PlateFormats, load_plate_formats
+
+from .common import load_manifest, segment_plate, timed
+
+
+def letter_positions(formats: PlateFormats, number: str) -> list[int]:
+    """
+    Позиции букв в эталонном номере по первой раскладке активных форматов,
+    которой он соответствует; номер вне форматов букв для сравнения не даёт
+    """
+    for r, layout in enumerate(formats.layouts):
+        profile = formats.profiles[formats.layout_profiles[r]]
+        if len(layout) == len(number) and all(ch in profile.alphabet(c) for c, ch in zip(layout, number)):
+            return [i for i, c in enumerate(layout) if c == LETTER]
+    return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--manifest', default='img/labels.csv')
+    parser.add_argument('--repeat', type=int, default=5, help='повторов распознавания на изображение')
+    args = parser.parse_args()
+
+    backends = ['template']
+    if shutil.which('tesseract'):
+        backends.append('tesseract')
+    else:
+        print('tesseract не найден в PATH, сравнение только для шаблонов')
+
+    templates = get_template_bank()
+    formats = load_plate_formats()
+    # Детекция и сегментация общие для всех бэкендов, считаем их один раз
+    plates = [(segment_plate(path), number) for path, number in load_manifest(args.manifest)]
+    # Буквы сравниваем только там, где сегментация дала полный номер
+    plates = [(symbols, number) for symbols, number in plates if len(symbols) >= formats.layout_lengths.min()]
+
+    for backend in backends:
+        elapsed, letters, correct = 0.0, 0, 0
+        for symbols, number in plates:
+            recognizer = CharRecognizer(symbols, templates, backend, formats=formats)
+            for _ in range(args.repeat):
+                text, t = timed(recognizer.recognize)
+                elapsed += t
+            for i in letter_positions(formats, number):
+                letters += 1
+                correct += i < len(text) and i < len(number) and text[i] == number[i]
+
+        plates_per_sec = len(plates) * args.repeat / elapsed if elapsed else 0.0
+        accuracy = correct / letters if letters else 0.0
+        print(f'{backend:>10}: {plates_per_sec:10.1f} номеров/с, точность букв {accuracy:.1%} ({correct}/{letters})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Подбор порога предварительной проверки кадров (PlatePrescreen)
+
+Запуск из корня репозитория:
+    python -m benchmarks.prescreen
+    python -m benchmarks.prescreen --negatives frames/empty --reduction 8
+
+Изображения из разметки считаются кадрами с номером, изображения из
+--negatives — кадрами без номера. Для каждого порога min_regions выводится,
+сколько кадров с номером сохраняется, сколько пустых отбрасывается и
+среднее время на кадр с проверкой (проверка + полная обработка принятых).
+"""
+import argparse
+import json
+
+import numpy as np
+
+from src.carnum import Pipeline, PlatePrescreen, collect_image_paths
+
+from .common import load_manifest, timed
+
+THRESHOLDS = (1, 2, 3, 4, 6, 8)
+
+
+def measure(paths: list[str], prescreen: PlatePrescreen, pipeline: Pipeline) -> dict[str, np.ndarray]:
+    """
+    Число областей, время проверки и время полной обработки каждого изображения, мс
+    """
+    regions, screen_ms, full_ms = [], [], []
+    for path in paths:
+        with open(path, 'rb') as f:
+            data = f.read()
+        small, decode_time = timed(prescreen.decode, data)
+        if small is None:
+            continue
+        screen, screen_time = timed(prescreen.screen, small)
+        _, full_time = timed(pipeline.process_encoded_batch, [(path, data)])
+        regions.append(screen.regions)
+        screen_ms.append((decode_time + screen_time) * 1000)
+        full_ms.append(full_time * 1000)
+    return {'regions': np.array(regions), 'screen_ms': np.array(screen_ms), 'full_ms': np.array(full_ms)}
+
+
+def sweep(positives: dict[str, np.ndarray], negatives: dict[str, np.ndarray]) -> list[dict[str, float]]:
+    rows = []
+    samples = {name: np.concatenate([positives[name], negatives[name]]) for name in positives}
+    for threshold in THRESHOLDS:
+        accepted = samples['regions'] >= threshold
+        row = {
+            'min_regions': threshold,
+            'kept_with_plate': float(np.mean(positives['regions'] >= threshold)) if positives['regions'].size else 0.0,
+            'rejected_without_plate': (
+                float(np.mean(negatives['regions'] < threshold)) if negatives['regions'].size else 0.0
+            ),
+            # Время на кадр: проверка всегда, полная обработка — только для принятых
+            'mean_ms': float(np.mean(samples['screen_ms'] + accepted * samples['full_ms'])),
+        }
+        rows.append({key: round(value, 3) for key, value in row.items()})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--manifest', default='img/labels.csv')
+    parser.add_argument('--negatives', nargs='*', default=[], help='каталоги или glob-шаблоны с кадрами без номера')
+    parser.add_argument('--reduction', type=int, choices=[2, 4, 8], default=4)
+    args = parser.parse_args()
+
+    prescreen = PlatePrescreen(args.reduction)
+    pipeline = Pipeline(collect_metrics=False)
+    positives = measure([path for path, _ in load_manifest(args.manifest)], prescreen, pipeline)
+    negatives = measure(list(collect_image_paths(args.negatives)), prescreen, pipeline)
+
+    report = {
+        'reduction': args.reduction,
+        'images': {'with_plate': int(positives['regions'].size), 'without_plate': int(negatives['regions'].size)},
+        'screen_ms': round(float(np.concatenate([positives['screen_ms'], negatives['screen_ms']]).mean()), 3),
+        'full_ms': round(float(np.concatenate([positives['full_ms'], negatives['full_ms']]).mean()), 3),
+        'min_regions_with_plate': int(positives['regions'].min()) if positives['regions'].size else None,
+        'thresholds': sweep(positives, negatives),
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
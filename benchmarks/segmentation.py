@@ -0,0 +1,122 @@
+"""
+Сравнение способов сегментации символов (контуры против проекций) на img/
+
+Проекции — эксперимент только этого бенчмарка: рамка номера и цифры региона
+ломают профиль столбцов, и верных символов способ почти не даёт, поэтому
+в CharSegmenter и CLI его нет.
+
+Запуск из корня репозитория: python -m benchmarks.segmentation
+"""
+import argparse
+
+from cv2.typing import MatLike
+import numpy as np
+
+from src.carnum import CharRecognizer, CharSegmenter
+from src.carnum import get_template_bank
+
+from .common import char_matches, crop_plate, load_manifest, timed
+
+# Пороги проекций — доли ширины номера (строки) и высоты полосы символов (столбцы)
+ROW_INK_MIN = 0.05
+ROW_INK_MAX = 0.6
+COLUMN_INK_MIN = 0.1
+COLUMN_INK_MAX = 0.95
+# Минимальная ширина отрезка столбцов, доля ширины номера
+COLUMN_WIDTH_MIN = 0.025
+
+
+def runs(mask: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Начала и концы (не включая) отрезков подряд идущих True
+    """
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def longest_run(mask: np.ndarray) -> tuple[int, int]:
+    starts, ends = runs(mask)
+    if starts.size == 0:
+        return 0, 0
+    longest = int(np.argmax(ends - starts))
+    return int(starts[longest]), int(ends[longest])
+
+
+def projection_boxes(binary: MatLike) -> np.ndarray:
+    """
+    Рамки символов (x, y, w, h) по проекциям: полоса строк с символами, в ней — отрезки
+    столбцов между провалами суммы тёмных пикселей
+    """
+    empty = np.empty((0, 4), dtype=np.int32)
+    ink = binary == 0
+    h_img, w_img = ink.shape
+
+    # Полоса символов: строки с заметной долей тёмных пикселей, но не почти
+    # целиком тёмные строки рамки номера
+    row_ink = ink.sum(axis=1)
+    band_start, band_end = longest_run((row_ink > ROW_INK_MIN * w_img) & (row_ink < ROW_INK_MAX * w_img))
+    if band_end <= band_start:
+        return empty
+
+    band = ink[band_start:band_end]
+    # Символы разделяет провал проекции; столбцы рамки тянутся почти на всю полосу
+    col_ink = band.sum(axis=0)
+    starts, ends = runs((col_ink > COLUMN_INK_MIN * band.shape[0]) & (col_ink < COLUMN_INK_MAX * band.shape[0]))
+    # Узкие обрывки (шум, вертикальная черта К отдельно от диагоналей) символами не считаем
+    wide = ends - starts >= COLUMN_WIDTH_MIN * w_img
+    starts, ends = starts[wide], ends[wide]
+    if starts.size == 0:
+        return empty
+
+    boxes = []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        rows = np.flatnonzero(band[:, start:end].any(axis=1))
+        top, bottom = int(rows[0]), int(rows[-1]) + 1
+        boxes.append((start, band_start + top, end - start, bottom - top))
+    return np.array(boxes, dtype=np.int32)
+
+
+def segment_projection(segmenter: CharSegmenter) -> list[MatLike]:
+    binary = segmenter.binarize()
+    boxes = segmenter.filter_boxes(projection_boxes(binary))
+    return [binary[box.y:box.y+box.h, box.x:box.x+box.w] for box in boxes]
+
+
+STRATEGIES = {
+    'contours': CharSegmenter.segment_characters,
+    'projection': segment_projection,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--manifest', default='img/labels.csv')
+    parser.add_argument('--repeat', type=int, default=20, help='повторов сегментации на номер')
+    args = parser.parse_args()
+
+    templates = get_template_bank()
+    # Детекция общая для всех способов, считаем её один раз
+    plates = [(crop_plate(path), number) for path, number in load_manifest(args.manifest)]
+    plates = [(number_img, number) for number_img, number in plates if number_img is not None]
+
+    for strategy, segment in STRATEGIES.items():
+        elapsed, exact, correct, total = 0.0, 0, 0, 0
+        for number_img, number in plates:
+            segmenter = CharSegmenter(number_img)
+            for _ in range(args.repeat):
+                chars, t = timed(segment, segmenter)
+                elapsed += t
+            text = CharRecognizer(chars, templates).recognize()
+            exact += len(chars) == len(number)
+            correct += char_matches(text, number)
+            total += len(number)
+
+        ms = elapsed / (len(plates) * args.repeat) * 1000 if plates else 0.0
+        print(
+            f'{strategy:>10}: {ms:7.3f} мс/номер, верное число символов {exact}/{len(plates)}, '
+            f'точность символов {correct / total if total else 0.0:.1%} ({correct}/{total})'
+        )
+
+
+if __name__ == '__main__':
+    main()
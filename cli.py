@@ -0,0 +1,267 @@
+import argparse
+import json
+import signal
+import sys
+
+from src.carnum import (
+    BatchRunner, ColorLocalizer, Pipeline, PipelineConfig, PlateNormalizer, PlatePrescreen, VideoPipeline,
+    collect_image_paths,
+)
+from src.carnum.instrumentation import MetricsAggregator, configure_logging
+from src.carnum.plate_format import (
+    EXAMPLE_FORMATS_FILE, FORMATS_FILE, PlateFormats, load_plate_formats, read_profiles,
+)
+
+
+def load_config(path: str | None) -> PipelineConfig | None:
+    return PipelineConfig.load(path) if path else None
+
+
+def make_normalizer(args: argparse.Namespace) -> PlateNormalizer | None:
+    return PlateNormalizer() if args.deskew else None
+
+
+def make_localizer(args: argparse.Namespace) -> ColorLocalizer | None:
+    return ColorLocalizer() if args.color_rois else None
+
+
+def make_prescreen(args: argparse.Namespace) -> PlatePrescreen | None:
+    return PlatePrescreen(args.prescreen, args.prescreen_min_regions) if args.prescreen else None
+
+
+def make_formats(args: argparse.Namespace) -> PlateFormats:
+    names = [name.strip() for name in args.formats.split(',') if name.strip()]
+    return load_plate_formats(names, args.formats_file)
+
+
+def run_batch(args: argparse.Namespace) -> None:
+    sources: list[str] = list(args.sources)
+    if args.from_file == '-':
+        sources.extend(line.strip() for line in sys.stdin if line.strip())
+    elif args.from_file:
+        with open(args.from_file, encoding='utf-8') as f:
+            sources.extend(line.strip() for line in f if line.strip())
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    aggregator = MetricsAggregator()
+    try:
+        runner = BatchRunner(
+            args.workers,
+            log_level=args.log_level,
+            templates_dir=args.templates,
+            letter_backend=args.letters,
+            config=load_config(args.config),
+            normalizer=make_normalizer(args),
+            prescreen=make_prescreen(args),
+            min_confidence=args.min_confidence,
+            formats=make_formats(args),
+            threads=args.threads,
+            localizer=make_localizer(args),
+            cache_path=args.cache,
+            cache_size=args.cache_size,
+        )
+        for result in runner.run(collect_image_paths(sources)):
+            output.write(json.dumps(result.to_dict(), ensure_ascii=False) + '\n')
+            output.flush()
+            aggregator.add(result.timings, result.counters)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    if args.summary:
+        with open(args.summary, 'w', encoding='utf-8') as f:
+            json.dump(aggregator.summary(), f, ensure_ascii=False, indent=2)
+
+
+def run_video(args: argparse.Namespace) -> None:
+    # Номер камеры передаётся числом, всё остальное — путь или URL потока
+    source = int(args.source) if args.source.isdigit() else args.source
+    pipeline = Pipeline(
+        templates_dir=args.templates,
+        letter_backend=args.letters,
+        config=load_config(args.config),
+        normalizer=make_normalizer(args),
+        prescreen=make_prescreen(args),
+        min_confidence=args.min_confidence,
+        formats=make_formats(args),
+        threads=args.threads,
+        localizer=make_localizer(args),
+        cache_path=args.cache,
+        cache_size=args.cache_size,
+    )
+    video = VideoPipeline(
+        pipeline,
+        frame_step=args.step,
+        queue_size=args.queue_size,
+        queue_policy='block' if args.no_drop else 'drop_oldest',
+    )
+    for track in video.run(source):
+        print(json.dumps(track.to_dict(), ensure_ascii=False), flush=True)
+
+
+def run_tune(args: argparse.Namespace) -> None:
+    from src.carnum.tuner import DEFAULT_SPACE, ParameterTuner, grid_configs, load_labels, random_configs, validate_space
+
+    space = DEFAULT_SPACE
+    if args.space:
+        with open(args.space, encoding='utf-8') as f:
+            space = json.load(f)
+    validate_space(space)
+
+    base = load_config(args.config)
+    if args.random:
+        configs = random_configs(space, args.random, args.seed, base)
+    else:
+        configs = grid_configs(space, base)
+
+    tuner = ParameterTuner(
+        load_labels(args.manifest),
+        args.workers,
+        args.templates,
+        letter_backend=args.letters,
+        normalizer=make_normalizer(args),
+        min_confidence=args.min_confidence,
+        formats=make_formats(args),
+    )
+    results = tuner.run(configs)
+
+    best = results[0]
+    best.config.save(args.output)
+    print(
+        f'{len(results)} конфигураций, лучшая: номера {best.plate_accuracy:.1%}, '
+        f'символы {best.char_accuracy:.1%} -> {args.output}',
+        file=sys.stderr,
+    )
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump([r.to_dict() for r in results], f, ensure_ascii=False, indent=2)
+
+
+def run_serve(args: argparse.Namespace) -> None:
+    from src.carnum.service import RecognitionServer, RecognitionService
+
+    service = RecognitionService(
+        args.workers,
+        max_batch=args.max_batch,
+        max_wait=args.max_wait_ms / 1000,
+        log_level=args.log_level,
+        templates_dir=args.templates,
+        letter_backend=args.letters,
+        config=load_config(args.config),
+        normalizer=make_normalizer(args),
+        prescreen=make_prescreen(args),
+        min_confidence=args.min_confidence,
+        formats=make_formats(args),
+        threads=args.threads,
+        localizer=make_localizer(args),
+        cache_path=args.cache,
+        cache_size=args.cache_size,
+    )
+    service.start()
+    server = RecognitionServer((args.host, args.port), service)
+    # SIGTERM останавливает сервис так же, как Ctrl+C: с закрытием пула процессов
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    print(f'carnum слушает http://{args.host}:{server.server_port}', file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+
+
+def main():
+    formats_help = ', '.join(read_profiles())
+    parser = argparse.ArgumentParser(prog='carnum', description='Распознавание автомобильных номеров без GUI')
+    parser.add_argument('--log-level', default='WARNING', help='уровень логирования (DEBUG, INFO, WARNING, ...)')
+
+    # Опции распознавания, общие для всех команд (в tune — настройки, с которыми оцениваются конфигурации)
+    recognition = argparse.ArgumentParser(add_help=False)
+    recognition.add_argument('--templates', default='img/templates', help='каталог с шаблонами символов')
+    recognition.add_argument('--letters', choices=['template', 'tesseract'], default='template', help='способ распознавания букв')
+    recognition.add_argument('--deskew', action='store_true', help='выравнивать наклонённые номера перед сегментацией')
+    recognition.add_argument(
+        '--min-confidence', type=float, default=None,
+        help='перепроверять следующими кандидатами номера, у которых оценка самого слабого символа ниже порога',
+    )
+    recognition.add_argument(
+        '--formats', default='ru',
+        help=f'форматы номеров через запятую ({formats_help})',
+    )
+    recognition.add_argument(
+        '--formats-file', default=FORMATS_FILE,
+        help=f'JSON с описаниями форматов (примеры форматов без шаблонов символов: {EXAMPLE_FORMATS_FILE})',
+    )
+
+    # Опции обработки изображений и кадров: batch, video и serve
+    processing = argparse.ArgumentParser(add_help=False, parents=[recognition])
+    processing.add_argument('--config', help='JSON с порогами этапов (например, результат carnum tune)')
+    processing.add_argument(
+        '--prescreen', type=int, choices=[2, 4, 8], default=None, metavar='N',
+        help='отбрасывать кадры без похожих на номер областей по копии, уменьшенной в N раз (2, 4, 8)',
+    )
+    processing.add_argument('--prescreen-min-regions', type=int, default=1, help='порог предварительной проверки')
+    processing.add_argument(
+        '--threads', type=int, default=0,
+        help='потоков общего пула для этапов одного изображения (0 — последовательно)',
+    )
+    processing.add_argument(
+        '--color-rois', action='store_true',
+        help='искать номер сначала в белых и синих областях (изображения читаются в цвете)',
+    )
+    processing.add_argument('--cache', help='файл SQLite для кэша результатов по содержимому изображений')
+    processing.add_argument('--cache-size', type=int, default=100_000, help='наибольшее число записей в кэше')
+
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    batch = subparsers.add_parser(
+        'batch', parents=[processing], help='пакетная обработка изображений в пуле процессов (JSONL)',
+    )
+    batch.add_argument('sources', nargs='*', help='каталоги, glob-шаблоны, пути к изображениям или контейнеры .tar, .zip, .npy')
+    batch.add_argument('--from-file', help='файл со списком путей (по одному на строку, "-" для stdin)')
+    batch.add_argument('-j', '--workers', type=int, default=None, help='число процессов (по умолчанию все ядра)')
+    batch.add_argument('-o', '--output', help='файл для JSONL (по умолчанию stdout)')
+    batch.add_argument('--summary', help='файл для сводных гистограмм времени этапов (JSON)')
+    batch.set_defaults(func=run_batch)
+
+    video = subparsers.add_parser(
+        'video', parents=[processing], help='распознавание номеров в видеофайле или потоке (JSONL по трекам)',
+    )
+    video.add_argument('source', help='путь к видео, URL потока или номер камеры')
+    video.add_argument('--step', type=int, default=1, help='обрабатывать каждый N-й кадр')
+    video.add_argument('--queue-size', type=int, default=8, help='размер очереди кадров')
+    video.add_argument('--no-drop', action='store_true', help='не выбрасывать кадры при переполнении очереди')
+    video.set_defaults(func=run_video)
+
+    tune = subparsers.add_parser(
+        'tune', parents=[recognition], help='подбор порогов детектора и сегментатора по размеченным изображениям',
+    )
+    tune.add_argument('--manifest', default='img/labels.csv', help='CSV с колонками path и number')
+    tune.add_argument('--space', help='JSON: параметр -> список значений (по умолчанию встроенная сетка)')
+    tune.add_argument('--random', type=int, default=0, help='случайный поиск из N конфигураций вместо полной сетки')
+    tune.add_argument('--seed', type=int, default=None, help='зерно случайного поиска')
+    tune.add_argument('--config', help='базовая конфигурация для параметров вне пространства поиска')
+    tune.add_argument('-j', '--workers', type=int, default=None, help='число процессов (по умолчанию все ядра)')
+    tune.add_argument('-o', '--output', default='carnum_config.json', help='куда записать лучшую конфигурацию')
+    tune.add_argument('--report', help='файл со всеми конфигурациями и их точностью (JSON)')
+    tune.set_defaults(func=run_tune)
+
+    serve = subparsers.add_parser(
+        'serve', parents=[processing], help='локальный HTTP-сервис распознавания с тёплыми рабочими процессами',
+    )
+    serve.add_argument('--host', default='127.0.0.1', help='адрес для прослушивания')
+    serve.add_argument('--port', type=int, default=8080, help='порт (0 — любой свободный)')
+    serve.add_argument('-j', '--workers', type=int, default=None, help='число процессов (по умолчанию все ядра)')
+    serve.add_argument('--max-batch', type=int, default=8, help='наибольший размер пачки запросов')
+    serve.add_argument('--max-wait-ms', type=float, default=5, help='сколько ждать запросов для пачки, мс')
+    serve.set_defaults(func=run_serve)
+
+    args = parser.parse_args()
+    configure_logging(args.log_level.upper())
+    args.log_level = args.log_level.upper()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,17 +1,15 @@
 import cv2
-from cv2.typing import MatLike
-import numpy as np
 
-def generate_digit_template(digit: str, size: tuple[int, int] = (48, 32)) -> MatLike:
-    img = np.ones(size, dtype=np.uint8) * 255
-    # Используем шрифт, близкий к номерам — например, "Arial" или "Digital"
-    _ = cv2.putText(img, digit, (-2, 42), cv2.FONT_HERSHEY_DUPLEX, 1.8, (0, 0, 0), 2)
-    # _, img = cv2.threshold(img, 127, 255, cv2.THRESH_BINARY)
-    return img
+from src.carnum.template_bank import DIGITS, LETTERS
+from src.carnum.template_generator import generate_digit_template, generate_letter_template
 
 
 if __name__ == '__main__':
-    for d in '0123456789':
+    for d in DIGITS:
         tmpl = generate_digit_template(d)
         r = cv2.imwrite(f'img/templates/{d}.png', tmpl)
         print(r)
+    for letter in LETTERS:
+        tmpl = generate_letter_template(letter)
+        r = cv2.imwrite(f'img/templates/{letter}.png', tmpl)
+        print(r)
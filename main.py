@@ -2,7 +2,7 @@ import sys
 
 from PySide6.QtWidgets import QApplication
 
-from src.carnum import MainWindow
+from src.carnum.main_window import MainWindow
 
 
 def main():
@@ -1,10 +1,83 @@
-from .bounding_box import BoundingBox
-from .char_recognizer import CharRecognizer
-from .char_segmenter import CharSegmenter
-from .number_candidate import NumberCandidate
-from .number_detector import NumberDetector
-from .main_window import MainWindow
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .bounding_box import BoundingBox
+    from .template_matcher import TemplateMatcher
+    from .template_bank import TemplateBank, get_template_bank
+    from .char_recognizer import CharRecognizer
+    from .plate_reading import CharReading, PlateReading
+    from .char_segmenter import CharSegmenter
+    from .color_localizer import ColorLocalizer
+    from .number_candidate import NumberCandidate
+    from .candidate_set import CandidateSet
+    from .number_detector import NumberDetector
+    from .pipeline import Pipeline, PipelineResult
+    from .pipeline_config import PipelineConfig
+    from .plate_format import PlateFormats, PlateProfile, is_valid_plate, load_plate_formats
+    from .plate_normalizer import PlateNormalizer
+    from .prescreen import PlatePrescreen
+    from .result_cache import ResultCache
+    from .scratch_buffers import ScratchBuffers
+    from .thread_pool import shared_thread_pool
+    from .archive_reader import ArchiveEntry, ArchiveReader
+    from .batch_runner import BatchRunner, collect_image_paths
+    from .video_stream import PlateTrack, PlateTracker, VideoPipeline
+    from .service import RecognitionServer, RecognitionService
 
 
 __version__ = '0.1.0'
-__all__ = ['NumberCandidate', 'BoundingBox', 'NumberDetector', 'CharRecognizer', 'CharSegmenter', 'MainWindow']
+
+# Имя -> модуль пакета. Модули импортируются при первом обращении, чтобы
+# рабочий процесс с `from carnum import NumberDetector` грузил только cv2/NumPy
+_exports: dict[str, str] = {
+    'NumberCandidate': 'number_candidate',
+    'BoundingBox': 'bounding_box',
+    'CandidateSet': 'candidate_set',
+    'NumberDetector': 'number_detector',
+    'TemplateMatcher': 'template_matcher',
+    'TemplateBank': 'template_bank',
+    'get_template_bank': 'template_bank',
+    'CharRecognizer': 'char_recognizer',
+    'CharReading': 'plate_reading',
+    'PlateReading': 'plate_reading',
+    'CharSegmenter': 'char_segmenter',
+    'Pipeline': 'pipeline',
+    'PipelineResult': 'pipeline',
+    'PipelineConfig': 'pipeline_config',
+    'is_valid_plate': 'plate_format',
+    'PlateFormats': 'plate_format',
+    'PlateProfile': 'plate_format',
+    'load_plate_formats': 'plate_format',
+    'PlateNormalizer': 'plate_normalizer',
+    'PlatePrescreen': 'prescreen',
+    'ColorLocalizer': 'color_localizer',
+    'ResultCache': 'result_cache',
+    'ScratchBuffers': 'scratch_buffers',
+    'shared_thread_pool': 'thread_pool',
+    'ArchiveEntry': 'archive_reader',
+    'ArchiveReader': 'archive_reader',
+    'BatchRunner': 'batch_runner',
+    'collect_image_paths': 'batch_runner',
+    'PlateTrack': 'video_stream',
+    'PlateTracker': 'video_stream',
+    'VideoPipeline': 'video_stream',
+    'RecognitionService': 'service',
+    'RecognitionServer': 'service',
+}
+
+__all__ = list(_exports)
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _exports.get(name)
+    if module_name is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+    value = getattr(import_module(f'.{module_name}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
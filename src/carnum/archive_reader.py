@@ -0,0 +1,144 @@
+from dataclasses import dataclass
+import mmap
+import os
+import struct
+import tarfile
+from typing import BinaryIO
+import zipfile
+
+import numpy as np
+
+# Контейнеры, которые читаются через отображение в память
+ARCHIVE_EXTENSIONS = {'.tar', '.zip', '.npy'}
+
+# Локальный заголовок файла в ZIP: сигнатура и 26 байт полей, из которых нужны длины имени и extra
+_ZIP_LOCAL_HEADER = struct.Struct('<4s22xHH')
+
+
+def is_archive(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in ARCHIVE_EXTENSIONS
+
+
+@dataclass(frozen=True)
+class ArchiveEntry:
+    """
+    Один элемент контейнера: смещение и размер данных в файле.
+    Для стопки кадров .npy offset — номер кадра, size — 0
+    """
+    name: str
+    offset: int
+    size: int
+    # Сжатые элементы ZIP нельзя отдать без копии, их приходится распаковывать
+    compressed: bool = False
+
+
+class ArchiveReader:
+    """
+    Чтение изображений из упакованных контейнеров без копирования.
+
+    Файл отображается в память, а элементы отдаются как memoryview на
+    отображённые байты: cv2.imdecode и хэш кэша читают их прямо из страниц
+    файла. Поддерживаются несжатый tar, zip (элементы без сжатия — без копии)
+    и .npy со стопкой кадров в оттенках серого формы (N, H, W), которые
+    отдаются уже декодированными. Отображения живут до close()
+    """
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self.entries: list[ArchiveEntry] = []
+        self.frames: np.ndarray | None = None
+        self.__file: BinaryIO | None = None
+        self.__map: mmap.mmap | None = None
+        self.__zip: zipfile.ZipFile | None = None
+
+        kind = os.path.splitext(path)[1].lower()
+        if kind == '.npy':
+            self.__open_frames()
+        elif kind in ('.tar', '.zip'):
+            self.__file = open(path, 'rb')
+            try:
+                self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+                if kind == '.tar':
+                    self.__index_tar()
+                else:
+                    self.__index_zip()
+            except BaseException:
+                self.close()
+                raise
+        else:
+            raise ValueError(f'unsupported archive: {path}')
+
+    @property
+    def encoded(self) -> bool:
+        """
+        Элементы — закодированные файлы (JPEG, PNG, ...), а не готовые кадры
+        """
+        return self.frames is None
+
+    def view(self, entry: ArchiveEntry) -> memoryview:
+        """
+        Байты закодированного элемента
+        """
+        assert self.__map is not None, 'archive holds decoded frames, use frame()'
+        if entry.compressed:
+            assert self.__zip is not None
+            return memoryview(self.__zip.read(entry.name))
+        return memoryview(self.__map)[entry.offset:entry.offset + entry.size]
+
+    def frame(self, entry: ArchiveEntry) -> np.ndarray:
+        """
+        Кадр из стопки .npy (только для чтения, без копии)
+        """
+        assert self.frames is not None, 'archive holds encoded images, use view()'
+        return self.frames[entry.offset]
+
+    def close(self) -> None:
+        if self.__zip is not None:
+            self.__zip.close()
+        self.frames = None
+        if self.__map is not None:
+            self.__map.close()
+        if self.__file is not None:
+            self.__file.close()
+
+    def __enter__(self) -> 'ArchiveReader':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __open_frames(self) -> None:
+        frames = np.load(self.path, mmap_mode='r')
+        if frames.ndim != 3 or frames.dtype != np.uint8:
+            raise ValueError(f'{self.path}: expected uint8 frames of shape (N, H, W), got {frames.dtype} {frames.shape}')
+        self.frames = frames
+        stem = os.path.splitext(os.path.basename(self.path))[0]
+        self.entries = [ArchiveEntry(f'{stem}_{i:06d}', i, 0) for i in range(len(frames))]
+
+    def __index_tar(self) -> None:
+        try:
+            # 'r:' — только несжатый tar: у сжатого нет смещений данных в файле
+            with tarfile.open(self.path, 'r:') as tar:
+                self.entries = [
+                    ArchiveEntry(member.name, member.offset_data, member.size)
+                    for member in tar
+                    if member.isfile()
+                ]
+        except tarfile.ReadError as e:
+            raise ValueError(f'{self.path}: only uncompressed tar archives can be memory-mapped') from e
+
+    def __index_zip(self) -> None:
+        assert self.__map is not None
+        try:
+            self.__zip = zipfile.ZipFile(self.__file)
+        except zipfile.BadZipFile as e:
+            raise ValueError(f'{self.path}: {e}') from e
+        for info in self.__zip.infolist():
+            if info.is_dir():
+                continue
+            signature, name_length, extra_length = _ZIP_LOCAL_HEADER.unpack_from(self.__map, info.header_offset)
+            if signature != b'PK\x03\x04':
+                raise ValueError(f'{self.path}: broken local header for {info.filename}')
+            offset = info.header_offset + _ZIP_LOCAL_HEADER.size + name_length + extra_length
+            self.entries.append(ArchiveEntry(
+                info.filename, offset, info.compress_size, info.compress_type != zipfile.ZIP_STORED,
+            ))
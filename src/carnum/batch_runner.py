@@ -0,0 +1,135 @@
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+import glob
+import logging
+import os
+from pathlib import Path
+from typing import Any
+
+import cv2
+
+from src.carnum.archive_reader import ArchiveEntry, ArchiveReader, is_archive
+from src.carnum.pipeline import Pipeline
+from src.carnum.pipeline import PipelineResult
+from src.carnum.template_bank import get_template_bank
+from src.carnum.instrumentation import configure_logging
+
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.webp'}
+
+# Пайплайн рабочего процесса: создаётся один раз в initializer и живёт до конца пула
+_worker_pipeline: Pipeline | None = None
+# Открытые в рабочем процессе контейнеры: каждый процесс отображает файл сам,
+# страницы общие через кэш ОС, а по каналу передаются только смещения
+_worker_archives: dict[str, ArchiveReader] = {}
+
+
+def collect_image_paths(sources: Iterable[str]) -> Iterator[str]:
+    """
+    Разворачивает каталоги, glob-шаблоны и пути к файлам в список изображений
+    """
+    for source in sources:
+        if os.path.isdir(source):
+            for path in sorted(Path(source).rglob('*')):
+                if path.suffix.lower() in IMAGE_EXTENSIONS:
+                    yield str(path)
+        elif glob.has_magic(source):
+            yield from sorted(glob.iglob(source, recursive=True))
+        else:
+            yield source
+
+
+def _init_worker(pipeline_params: dict[str, Any], log_level: int | str) -> None:
+    global _worker_pipeline
+    configure_logging(log_level)
+    # Параллелим процессами, поэтому внутренние потоки OpenCV только мешают
+    cv2.setNumThreads(1)
+    _worker_pipeline = Pipeline(**pipeline_params)
+
+
+def _process_in_worker(path: str) -> PipelineResult:
+    assert _worker_pipeline is not None, 'worker is not initialized'
+    try:
+        return _worker_pipeline.process_file(path)
+    except Exception as e:
+        return PipelineResult(path, error=str(e))
+
+
+def _process_archive_entry(archive_path: str, entry: ArchiveEntry) -> PipelineResult:
+    assert _worker_pipeline is not None, 'worker is not initialized'
+    name = f'{archive_path}/{entry.name}'
+    try:
+        reader = _worker_archives.get(archive_path)
+        if reader is None:
+            reader = _worker_archives[archive_path] = ArchiveReader(archive_path)
+        if reader.encoded:
+            return _worker_pipeline.process_encoded_batch([(name, reader.view(entry))])[0]
+        return _worker_pipeline.process(reader.frame(entry), name)
+    except Exception as e:
+        return PipelineResult(name, error=str(e))
+
+
+def archive_entries(path: str) -> list[ArchiveEntry]:
+    """
+    Изображения контейнера: элементы с расширением изображения или все кадры .npy
+    """
+    with ArchiveReader(path) as reader:
+        if not reader.encoded:
+            return reader.entries
+        return [entry for entry in reader.entries if os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS]
+
+
+class BatchRunner:
+    def __init__(
+        self,
+        workers: int | None = None,
+        max_pending: int | None = None,
+        log_level: int | str = logging.WARNING,
+        **pipeline_params: Any,
+    ) -> None:
+        self.workers: int = workers or os.cpu_count() or 1
+        # Ограничиваем число задач в очереди, чтобы не держать в памяти фьючерсы на весь архив
+        self.max_pending: int = max_pending or self.workers * 4
+        self.log_level: int | str = log_level
+        self.pipeline_params: dict[str, Any] = pipeline_params
+
+    def run(self, paths: Iterable[str]) -> Iterator[PipelineResult]:
+        """
+        Обрабатывает изображения в пуле процессов, результаты отдаются в порядке готовности.
+        Контейнеры (.tar, .zip, .npy) разворачиваются в свои элементы
+        """
+        # Загружаем банк до запуска пула: процессы, созданные через fork, наследуют его готовым
+        get_template_bank(self.pipeline_params.get('templates_dir', 'img/templates'))
+
+        with ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.pipeline_params, self.log_level)) as executor:
+            pending: set[Future[PipelineResult]] = set()
+
+            for path, entry in self.__expand(paths):
+                if entry is None:
+                    pending.add(executor.submit(_process_in_worker, path))
+                else:
+                    pending.add(executor.submit(_process_archive_entry, path, entry))
+                if len(pending) >= self.max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+    @staticmethod
+    def __expand(paths: Iterable[str]) -> Iterator[tuple[str, ArchiveEntry | None]]:
+        for path in paths:
+            if not is_archive(path):
+                yield path, None
+                continue
+            try:
+                entries = archive_entries(path)
+            except (OSError, ValueError):
+                # Повреждённый контейнер попадёт в результаты с ошибкой чтения, как обычный файл
+                yield path, None
+                continue
+            for entry in entries:
+                yield path, entry
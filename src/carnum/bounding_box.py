@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(slots=True)
 class BoundingBox:
     x: int
     y: int
@@ -9,4 +9,4 @@ class BoundingBox:
     h: int
 
     def __iter__(self):
-        return iter([self.x, self.y, self.w, self.h])
+        return iter((self.x, self.y, self.w, self.h))
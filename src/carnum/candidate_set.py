@@ -0,0 +1,132 @@
+from collections.abc import Sequence
+
+from cv2.typing import MatLike
+import numpy as np
+
+from src.carnum.bounding_box import BoundingBox
+from src.carnum.number_candidate import NumberCandidate
+
+
+class CandidateSet:
+    """
+    Кандидаты в номер в виде структуры массивов.
+
+    Рамки, площади и соотношения сторон лежат в непрерывных массивах NumPy,
+    вершины всех многоугольников — в одном общем буфере points, а контур
+    кандидата i — это points[offsets[i]:offsets[i + 1]]. Объекты NumberCandidate
+    создаются только по запросу через candidate(i) и ссылаются на буфер, а не копируют его
+    """
+    __slots__ = ('boxes', 'areas', 'aspect_ratios', 'points', 'offsets')
+
+    def __init__(
+        self,
+        boxes: np.ndarray,
+        areas: np.ndarray,
+        aspect_ratios: np.ndarray,
+        points: np.ndarray,
+        offsets: np.ndarray,
+    ) -> None:
+        self.boxes: np.ndarray = boxes  # (n, 4) int32: x, y, w, h
+        self.areas: np.ndarray = areas
+        self.aspect_ratios: np.ndarray = aspect_ratios
+        self.points: np.ndarray = points  # (m, 1, 2) int32, как у контуров OpenCV
+        self.offsets: np.ndarray = offsets  # (n + 1,)
+
+    @classmethod
+    def empty(cls) -> 'CandidateSet':
+        return cls(
+            np.empty((0, 4), dtype=np.int32),
+            np.empty(0, dtype=np.float64),
+            np.empty(0, dtype=np.float64),
+            np.empty((0, 1, 2), dtype=np.int32),
+            np.zeros(1, dtype=np.intp),
+        )
+
+    @classmethod
+    def from_polygons(
+        cls,
+        polygons: Sequence[MatLike],
+        boxes: np.ndarray,
+        areas: np.ndarray,
+    ) -> 'CandidateSet':
+        if not polygons:
+            return cls.empty()
+
+        boxes = np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+        offsets = np.zeros(len(polygons) + 1, dtype=np.intp)
+        np.cumsum([len(p) for p in polygons], out=offsets[1:])
+        return cls(
+            boxes,
+            np.asarray(areas, dtype=np.float64),
+            boxes[:, 2] / boxes[:, 3].astype(np.float64),
+            np.concatenate(polygons).astype(np.int32, copy=False),
+            offsets,
+        )
+
+    @classmethod
+    def concatenate(cls, sets: Sequence['CandidateSet']) -> 'CandidateSet':
+        """
+        Кандидаты нескольких наборов подряд, в порядке наборов
+        """
+        sets = [c for c in sets if len(c)]
+        if not sets:
+            return cls.empty()
+
+        offsets = np.zeros(sum(len(c) for c in sets) + 1, dtype=np.intp)
+        np.cumsum(np.concatenate([c.point_counts for c in sets]), out=offsets[1:])
+        return cls(
+            np.concatenate([c.boxes for c in sets]),
+            np.concatenate([c.areas for c in sets]),
+            np.concatenate([c.aspect_ratios for c in sets]),
+            np.concatenate([c.points for c in sets]),
+            offsets,
+        )
+
+    def __len__(self) -> int:
+        return len(self.areas)
+
+    @property
+    def point_counts(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def contour(self, i: int) -> np.ndarray:
+        return self.points[self.offsets[i]:self.offsets[i + 1]]
+
+    def candidate(self, i: int) -> NumberCandidate:
+        """
+        Представление одного кандидата (контур — срез общего буфера)
+        """
+        x, y, w, h = self.boxes[i].tolist()
+        return NumberCandidate(self.contour(i), BoundingBox(x, y, w, h), float(self.areas[i]), float(self.aspect_ratios[i]))
+
+    def take(self, indices: np.ndarray) -> 'CandidateSet':
+        """
+        Подмножество кандидатов в заданном порядке
+        """
+        indices = np.asarray(indices, dtype=np.intp)
+        if indices.size == 0:
+            return self.empty()
+
+        counts = self.point_counts[indices]
+        offsets = np.zeros(indices.size + 1, dtype=np.intp)
+        np.cumsum(counts, out=offsets[1:])
+        # Индексы вершин выбранных контуров одним массивом, без цикла по кандидатам
+        point_index = np.repeat(self.offsets[indices] - offsets[:-1], counts) + np.arange(offsets[-1])
+        return CandidateSet(
+            self.boxes[indices],
+            self.areas[indices],
+            self.aspect_ratios[indices],
+            self.points[point_index],
+            offsets,
+        )
+
+    def transformed(self, scale: float = 1.0, dx: int = 0, dy: int = 0) -> 'CandidateSet':
+        """
+        Кандидаты в другой системе координат: сначала масштаб, потом сдвиг.
+        Соотношение сторон сохраняется прежним, как и у исходных рамок
+        """
+        boxes = (self.boxes * scale).astype(np.int32)
+        boxes[:, 0] += dx
+        boxes[:, 1] += dy
+        points = (self.points * scale).astype(np.int32) + np.array([dx, dy], dtype=np.int32)
+        return CandidateSet(boxes, self.areas * scale ** 2, self.aspect_ratios, points, self.offsets)
@@ -1,58 +1,164 @@
-import cv2
+from concurrent.futures import Executor, Future
+from typing import Literal
+
 from cv2.typing import MatLike
-from pytesseract import image_to_string
+import numpy as np
+
+from src.carnum.instrumentation import NULL_METRICS, Metrics
+from src.carnum.plate_format import LETTER, PlateFormats, load_plate_formats
+from src.carnum.plate_reading import CharReading, PlateReading
+from src.carnum.template_bank import TemplateBank
+
+
+LetterBackend = Literal['template', 'tesseract']
+# Сколько лучших вариантов хранить для каждого символа
+TOP_K = 3
+# Множитель оценки буквы, которую пришлось угадать заменой цифры из ответа Tesseract
+SUBSTITUTION_PENALTY = 0.5
+UNKNOWN_CHAR = '?'
 
 
 class CharRecognizer:
-    def __init__(self, symbols: list[MatLike], templates: dict[str, MatLike]) -> None:
+    def __init__(
+        self,
+        symbols: list[MatLike],
+        templates: TemplateBank,
+        letter_backend: LetterBackend = 'template',
+        metrics: Metrics | None = None,
+        formats: PlateFormats | None = None,
+        executor: Executor | None = None,
+    ) -> None:
         self.symbols: list[MatLike] = symbols
-        self.templates: dict[str, MatLike] = templates
+        self.templates: TemplateBank = templates
+        self.letter_backend: LetterBackend = letter_backend
+        self.metrics: Metrics = metrics or NULL_METRICS
+        # Раскладки символов по позициям (по умолчанию — российский номер)
+        self.formats: PlateFormats = formats or load_plate_formats()
+        # С пулом буквы Tesseract читаются в потоках, пока цифры сравниваются с шаблонами
+        self.executor: Executor | None = executor
 
     def recognize(self) -> str:
-        chars: list[str] = []
-        for i, symbol in enumerate(self.symbols):
-            if i in [0, 4, 5]:  # 0, 4, 5 - буквы
-                char = self.__recognize_letter(symbol)
-            else:
-                char = self.__recognize_digit(symbol)
+        return self.read().text
 
-            chars.append(char)
+    def recognize_batch(self, plates: list[list[MatLike]]) -> list[str]:
+        return [reading.text for reading in self.read_batch(plates)]
 
-        return ''.join(chars)
+    def read(self, k: int = TOP_K) -> PlateReading:
+        """
+        Прочтение номера с оценками и k лучшими вариантами каждого символа
+        """
+        with self.metrics.timer('recognize'):
+            return self.read_batch([self.symbols], k)[0]
 
-    def __recognize_letter(self, symbol_img: MatLike) -> str:
+    def read_batch(self, plates: list[list[MatLike]], k: int = TOP_K) -> list[PlateReading]:
         """
-        Распознаёт один символ с помощью Tesseract.
+        Распознаёт символы сразу нескольких номеров: все символы сравниваются
+        со всеми шаблонами одним умножением матриц, а раскладка (какие позиции —
+        буквы, какие — цифры) выбирается по этим оценкам среди раскладок всех
+        активных форматов. С бэкендом Tesseract буквы выбранной раскладки
+        перечитываются им; с executor — наперёд, одновременно со сравнением
+        с шаблонами, для всех позиций, где букву ждёт хотя бы одна раскладка.
         """
-        char = str(image_to_string(
-            symbol_img,
-            lang='eng',
-            config='--psm 10 --oem 3 -c tessedit_char_whitelist=ABEKMHOPCTYX0123456789'
-        )).strip()
+        letters = self.__submit_letters(plates)
+        try:
+            return self.__read_batch(plates, k, letters)
+        finally:
+            # Буквы позиций, которые выбранная раскладка отдала цифрам, не нужны
+            for future in letters.values():
+                future.cancel()
 
-        # Tesseract иногда возвращает "1" вместо "А" и т.п. — можно добавить пост-обработку
-        return self.__fix_letter(char)
+    def __submit_letters(self, plates: list[list[MatLike]]) -> dict[tuple[int, int], Future[CharReading]]:
+        if self.letter_backend != 'tesseract' or self.executor is None:
+            return {}
+        return {
+            (p, i): self.executor.submit(self.__recognize_letter_tesseract, symbol)
+            for p, symbols in enumerate(plates)
+            for i, symbol in enumerate(symbols)
+            if self.formats.may_be_letter(i)
+        }
 
-    def __recognize_digit(self, symbol_img: MatLike) -> str:
+    def __read_batch(
+        self,
+        plates: list[list[MatLike]],
+        k: int,
+        letters: dict[tuple[int, int], Future[CharReading]],
+    ) -> list[PlateReading]:
+        chars = self.templates.chars
+        scores = self.templates.scores([symbol for symbols in plates for symbol in symbols])
+
+        readings: list[PlateReading] = []
+        start = 0
+        for p, symbols in enumerate(plates):
+            plate_scores = scores[start:start + len(symbols)]
+            start += len(symbols)
+            if not symbols:
+                readings.append(PlateReading())
+                continue
+
+            layout, allowed = self.formats.select_layout(plate_scores, chars)
+            plate_chars = [self.__top_k(row, mask, k) for row, mask in zip(plate_scores, allowed)]
+            if self.letter_backend == 'tesseract':
+                for i, symbol in enumerate(symbols):
+                    if self.formats.position_class(layout, i) == LETTER:
+                        future = letters.get((p, i))
+                        if future is not None:
+                            plate_chars[i] = future.result()
+                        else:
+                            plate_chars[i] = self.__recognize_letter_tesseract(symbol)
+
+            reading = PlateReading(plate_chars)
+            reading.format = self.formats.match(reading.text)
+            readings.append(reading)
+        return readings
+
+    def __top_k(self, scores: np.ndarray, allowed: np.ndarray, k: int) -> CharReading:
         """
-        Распознаёт цифру методом сравнения с шаблонами.
+        k лучших допустимых в позиции шаблонов по убыванию оценки
         """
-        resized = cv2.resize(symbol_img, (32, 48))
+        candidates = np.flatnonzero(allowed)
+        # Нет допустимых шаблонов (пустой банк или алфавит формата вне банка): символ неизвестен
+        if candidates.size == 0:
+            return CharReading(UNKNOWN_CHAR, 0.0)
+        # Устойчивая сортировка: при равных оценках выигрывает первый шаблон, как в argmax
+        order = candidates[np.argsort(-scores[candidates], kind='stable')[:k]]
+        alternatives = [(self.templates.chars[j], float(scores[j])) for j in order]
+        char, score = alternatives[0]
+        return CharReading(char, score, alternatives)
 
-        best_match, best_score = '?', -1
+    def __recognize_letter_tesseract(self, symbol_img: MatLike) -> CharReading:
+        """
+        Распознаёт один символ с помощью Tesseract.
+        """
+        # Импорт здесь: pytesseract нужен только запасному бэкенду
+        from pytesseract import Output, image_to_data
 
-        for digit, tmpl in self.templates.items():
-            match = cv2.matchTemplate(resized, tmpl, cv2.TM_CCOEFF_NORMED)
-            score: float = match[0][0]
-            if score > best_score:
-                best_score, best_match = score, digit
+        data = image_to_data(
+            symbol_img,
+            lang='eng',
+            config='--psm 10 --oem 3 -c tessedit_char_whitelist=ABEKMHOPCTYX0123456789',
+            output_type=Output.DICT,
+        )
+        # Слова с conf = -1 — это строки и блоки разметки, а не распознанный текст
+        words = [
+            (str(text).strip(), float(conf) / 100)
+            for text, conf in zip(data['text'], data['conf'])
+            if float(conf) >= 0 and str(text).strip()
+        ]
+        if not words:
+            return CharReading('', 0.0)
+        char, score = max(words, key=lambda word: word[1])
 
-        return best_match
+        # Tesseract иногда возвращает "1" вместо "А" и т.п.: замена по таблице
+        # не гарантирует верную букву, поэтому оценка такого символа снижается
+        fixed = self.__fix_letter(char)
+        if fixed != char:
+            score *= SUBSTITUTION_PENALTY
+        return CharReading(fixed, score, [(fixed, score)])
 
     def __fix_letter(self, char: str) -> str:
         match char:
             case '0': return 'O'
-            case '4': return 'У'
+            case '4': return 'Y'
             case '6': return 'B'
             case '7': return 'T'
             case '8': return 'B'
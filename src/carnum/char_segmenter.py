@@ -1,38 +1,68 @@
-from collections.abc import Sequence
 import cv2
 from cv2.typing import MatLike
-import matplotlib.pyplot as plt
+import numpy as np
+
+from .bounding_box import BoundingBox
+from .instrumentation import NULL_METRICS, Metrics
 
-from . import BoundingBox
 
 class CharSegmenter:
-    def __init__(self, number_img: MatLike):
+    def __init__(
+        self,
+        number_img: MatLike,
+        metrics: Metrics | None = None,
+        block_size: int = 13,
+        threshold_c: float = 5,
+        max_char_width: float = 0.125,
+    ):
         self.img: MatLike = number_img
+        self.block_size: int = block_size
+        self.threshold_c: float = threshold_c
+        # Доля ширины номера, больше которой символ быть не может (1 / длина самого короткого формата)
+        self.max_char_width: float = max_char_width
+        self.metrics: Metrics = metrics or NULL_METRICS
+
+    def segment_characters(self, debug: dict[str, MatLike] | None = None) -> list[MatLike]:
+        """
+        Выделяет символы номера. Если передан словарь debug, в него кладутся
+        промежуточные изображения: 'binary' и 'boxes' (найденные рамки символов)
+        """
+        with self.metrics.timer('segment'):
+            chars = self.__segment_characters(debug)
+        self.metrics.count('characters', len(chars))
+        return chars
 
-    def segment_characters(self) -> list[MatLike]:
-        img = self.__preprocess(self.img)
-
-        fig = plt.figure()
-        ax = fig.add_subplot(111)
-        plt.xticks([]), plt.yticks([])
-
-        ax.imshow(img, cmap='gray')
+    def __segment_characters(self, debug: dict[str, MatLike] | None) -> list[MatLike]:
+        img = self.binarize()
 
         contours, _ = cv2.findContours(img, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+        rects = np.array([cv2.boundingRect(cnt) for cnt in contours], dtype=np.int32).reshape(-1, 4)
+        boxes = self.filter_boxes(rects)
 
-        boxes = self.__filter_contours(contours)
+        if debug is not None:
+            debug['binary'] = img
+            debug['boxes'] = self.__draw_boxes(img, boxes)
 
         chars = self.__crop_characters(img, boxes)
         return chars
 
-    def __preprocess(self, img: MatLike) -> MatLike:
+    def __draw_boxes(self, img: MatLike, boxes: list[BoundingBox]) -> MatLike:
+        boxes_img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+        for box in boxes:
+            cv2.rectangle(boxes_img, (box.x, box.y), (box.x + box.w, box.y + box.h), (0, 255, 0), 1)
+        return boxes_img
+
+    def binarize(self) -> MatLike:
+        """
+        Бинаризация номера: символы чёрные на белом
+        """
         binary = cv2.adaptiveThreshold(
-            img,
+            self.img,
             255,
             cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
             cv2.THRESH_BINARY,
-            blockSize=13,
-            C=5,
+            blockSize=self.block_size,
+            C=self.threshold_c,
         )
 
         # Удаляем мелкие шумы (точки)
@@ -40,40 +70,32 @@ class CharSegmenter:
         binary = cv2.morphologyEx(binary, cv2.MORPH_OPEN, kernel_open)
         return binary
 
-    def __filter_contours(self, contours: Sequence[MatLike]) -> list[BoundingBox]:
+    def filter_boxes(self, rects: np.ndarray) -> list[BoundingBox]:
+        """
+        Отбор рамок (x, y, w, h) символов: пороги размеров считаются сразу для
+        всего массива, проход по перекрытиям — только по прошедшим отбор
+        """
         h_img, w_img = self.img.shape
-        boxes: list[BoundingBox] = []
-        for cnt in contours:
-            x, y, w, h = cv2.boundingRect(cnt)
-
-            if w < 5 or h < 10:
-                continue
-
-            if h <= 0.35 * h_img or h >= 0.8 * h_img:
-                continue
-
-            if w > 0.125 * w_img:  # один символ не может занимать больше 1/8 ширины номера (т.к. мин. 8 символов)
-                continue
-
-            aspect_ratio = w / float(h)
-            if aspect_ratio > 1.2:
-                continue
-
-            boxes.append(BoundingBox(x, y, w, h))
-
-        boxes = sorted(boxes, key=lambda b: b.x)
-
-        filtered = []
-        for box in boxes:
-            if not filtered:
-                filtered.append(box)
-                continue
-            last = filtered[-1]
-            overlap = max(0, min(last.x + last.w, box.x + box.w) - max(last.x, box.x))
-            if overlap > 8:  # если пересекаются — оставляем больший или первый
-                continue
-            filtered.append(box)
+        x, w, h = rects[:, 0], rects[:, 2], rects[:, 3]
 
+        keep = (
+            (w >= 5) & (h >= 10)
+            & (h > 0.35 * h_img) & (h < 0.8 * h_img)
+            & (w <= self.max_char_width * w_img)  # для российского номера из 8+ символов — не больше 1/8 ширины
+            & (w / h <= 1.2)  # соотношение сторон
+        )
+        rects = rects[keep]
+        rects = rects[np.argsort(rects[:, 0], kind='stable')]
+
+        filtered: list[BoundingBox] = []
+        last_x0 = last_x1 = 0
+        for bx, by, bw, bh in rects.tolist():
+            if filtered:
+                overlap = max(0, min(last_x1, bx + bw) - max(last_x0, bx))
+                if overlap > 8:  # если пересекаются — оставляем больший или первый
+                    continue
+            filtered.append(BoundingBox(bx, by, bw, bh))
+            last_x0, last_x1 = bx, bx + bw
 
         return filtered
 
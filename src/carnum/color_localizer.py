@@ -0,0 +1,104 @@
+import cv2
+from cv2.typing import MatLike
+import numpy as np
+
+from src.carnum.bounding_box import BoundingBox
+
+# Белый фон номера: малая насыщенность и яркость выше средней по окрестности
+WHITE_MAX_SATURATION = 80
+WHITE_MIN_VALUE = 80
+WHITE_LOCAL_CONTRAST = 15
+# Синяя область (поле региона, флаг): диапазон HSV OpenCV, H в 0..179
+BLUE_LOWER = (100, 120, 60)
+BLUE_UPPER = (125, 255, 255)
+# Тёмные штрихи символов, выделенные чёрной шляпой, в доле площади рамки
+TEXT_MIN_RATIO = 0.08
+TEXT_MAX_SCORE = 0.3
+# Пределы для связной области-кандидата
+ASPECT_MIN = 2.0
+ASPECT_MAX = 7.0
+ASPECT_BEST = 4.5
+AREA_MIN = 0.0008
+AREA_MAX = 0.05
+FILL_MIN = 0.45
+
+
+class ColorLocalizer:
+    """
+    Грубая локализация номера по цвету на уменьшенном изображении.
+
+    Маска белых (и синих) областей замыкается горизонтальным ядром,
+    связные области с пропорциями номера и тёмными штрихами внутри становятся
+    областями интереса (ROI) в координатах исходного изображения. Поиск
+    контуров NumberDetector затем идёт только внутри них
+    """
+    def __init__(self, work_width: int = 320, max_rois: int = 3) -> None:
+        self.work_width: int = work_width
+        self.max_rois: int = max_rois
+
+    def propose(self, img: MatLike) -> list[BoundingBox]:
+        """
+        Области интереса по убыванию правдоподобия. img — цветное изображение BGR
+        """
+        scale = min(1.0, self.work_width / img.shape[1])
+        small = img if scale == 1 else cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+        _, saturation, value = cv2.split(hsv)
+        mask = cv2.bitwise_or(self.__white_mask(saturation, value), cv2.inRange(hsv, BLUE_LOWER, BLUE_UPPER))
+        # Замыкаем промежутки между символами, затем убираем одиночные точки
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (9, 3)))
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (3, 2)))
+
+        count, _, stats, _ = cv2.connectedComponentsWithStats(mask)
+        if count <= 1:
+            return []
+
+        # Первая компонента — фон
+        x, y, w, h, area = stats[1:].T
+        box_area = np.maximum(w * h, 1)
+        aspect_ratio = w / np.maximum(h, 1)
+        fill = area / box_area
+        text = self.__box_sums(self.__dark_strokes(value), x, y, w, h) / box_area
+
+        keep = np.flatnonzero(
+            (aspect_ratio >= ASPECT_MIN) & (aspect_ratio <= ASPECT_MAX)
+            & (box_area >= AREA_MIN * small.shape[0] * small.shape[1])
+            & (box_area <= AREA_MAX * small.shape[0] * small.shape[1])
+            & (fill >= FILL_MIN)
+            & (text >= TEXT_MIN_RATIO)
+        )
+        scores = (
+            fill[keep]
+            - np.abs(np.log(aspect_ratio[keep] / ASPECT_BEST))
+            + 2 * np.minimum(text[keep], TEXT_MAX_SCORE)
+        )
+        best = keep[np.argsort(-scores, kind='stable')[:self.max_rois]]
+
+        return [
+            BoundingBox(int(x[i] / scale), int(y[i] / scale), int(np.ceil(w[i] / scale)), int(np.ceil(h[i] / scale)))
+            for i in best
+        ]
+
+    @staticmethod
+    def __white_mask(saturation: np.ndarray, value: np.ndarray) -> np.ndarray:
+        local = cv2.blur(value, (31, 31))
+        white = (
+            (saturation < WHITE_MAX_SATURATION)
+            & (value > WHITE_MIN_VALUE)
+            & (value.astype(np.int16) > local.astype(np.int16) + WHITE_LOCAL_CONTRAST)
+        )
+        return white.astype(np.uint8) * 255
+
+    @staticmethod
+    def __dark_strokes(value: np.ndarray) -> np.ndarray:
+        strokes = cv2.morphologyEx(value, cv2.MORPH_BLACKHAT, cv2.getStructuringElement(cv2.MORPH_RECT, (7, 7)))
+        return (strokes > 25).astype(np.uint8)
+
+    @staticmethod
+    def __box_sums(mask: np.ndarray, x: np.ndarray, y: np.ndarray, w: np.ndarray, h: np.ndarray) -> np.ndarray:
+        """
+        Суммы маски в рамках через интегральное изображение, сразу для всех рамок
+        """
+        integral = cv2.integral(mask)
+        return integral[y + h, x + w] - integral[y, x + w] - integral[y + h, x] + integral[y, x]
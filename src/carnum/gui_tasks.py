@@ -0,0 +1,86 @@
+from dataclasses import dataclass
+import time
+from typing import Any
+
+from PySide6.QtCore import QObject, QRunnable, Signal
+from cv2.typing import MatLike
+
+from src.carnum.pipeline import Pipeline, PipelineResult
+
+
+@dataclass
+class DebugView:
+    """
+    Промежуточные изображения распознавания одного файла для окна отладки
+    """
+    path: str
+    number: str
+    edges: MatLike
+    contour_img: MatLike
+    number_img: MatLike
+    boxes_img: MatLike
+    chars: list[MatLike]
+
+
+def read_debug_view(pipeline: Pipeline, path: str) -> DebugView:
+    """
+    Распознаёт файл тем же Pipeline, что и пакет, сохраняя промежуточные
+    изображения кандидата, попавшего в результат
+    """
+    debug: dict[str, Any] = {}
+    result = pipeline.process_file(path, debug)
+
+    assert result.error is None, result.error
+    assert debug, 'Не удалось распознать номер'
+
+    return DebugView(
+        path, result.number or '', debug['edges'], debug['contour'], debug['number'], debug['boxes'], debug['chars'],
+    )
+
+
+class TaskSignals(QObject):
+    """
+    Сигналы задач пула. QRunnable не наследует QObject, поэтому сигналы живут
+    в отдельном объекте главного потока и доставляются в него через очередь событий
+    """
+    # Номер пакета, результат и время обработки в миллисекундах
+    result = Signal(int, object, float)
+    debug_view = Signal(object)
+    failed = Signal(str, str)
+
+
+class RecognizeTask(QRunnable):
+    """
+    Распознавание одного файла пакета
+    """
+    def __init__(self, pipeline: Pipeline, path: str, batch_id: int, signals: TaskSignals) -> None:
+        super().__init__()
+        self.pipeline: Pipeline = pipeline
+        self.path: str = path
+        self.batch_id: int = batch_id
+        self.signals: TaskSignals = signals
+
+    def run(self) -> None:
+        start = time.perf_counter()
+        try:
+            result = self.pipeline.process_file(self.path)
+        except Exception as e:
+            result = PipelineResult(self.path, error=str(e))
+        self.signals.result.emit(self.batch_id, result, (time.perf_counter() - start) * 1000)
+
+
+class DebugViewTask(QRunnable):
+    """
+    Подготовка изображений отладки для выбранного файла
+    """
+    def __init__(self, pipeline: Pipeline, path: str, signals: TaskSignals) -> None:
+        super().__init__()
+        self.pipeline: Pipeline = pipeline
+        self.path: str = path
+        self.signals: TaskSignals = signals
+
+    def run(self) -> None:
+        try:
+            self.signals.debug_view.emit(read_debug_view(self.pipeline, self.path))
+        except Exception as e:
+            self.signals.failed.emit(self.path, str(e))
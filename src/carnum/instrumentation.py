@@ -0,0 +1,119 @@
+from bisect import bisect_right
+from collections.abc import Iterator
+from contextlib import contextmanager, nullcontext
+import logging
+import threading
+import time
+from typing import Any
+
+
+logger = logging.getLogger('carnum')
+
+# Границы корзин гистограммы времени, секунды (от 0.1 мс до ~100 с, шаг ×2)
+HISTOGRAM_BOUNDS: list[float] = [0.0001 * 2 ** i for i in range(20)]
+
+
+def configure_logging(level: int | str = logging.WARNING) -> None:
+    logging.basicConfig(format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    logger.setLevel(level)
+
+
+class Metrics:
+    """
+    Время этапов и счётчики для одного изображения. Этапы одного изображения
+    могут идти в потоках общего пула, поэтому обновления идут под блокировкой,
+    а время этапа — сумма по всем потокам
+    """
+    enabled: bool = True
+
+    def __init__(self) -> None:
+        self.timings: dict[str, float] = {}
+        self.counters: dict[str, int] = {}
+        self.__lock = threading.Lock()
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.__lock:
+                self.timings[stage] = self.timings.get(stage, 0.0) + elapsed
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self.__lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def as_dict(self) -> dict[str, Any]:
+        return {'timings': dict(self.timings), 'counters': dict(self.counters)}
+
+
+class NullMetrics(Metrics):
+    """
+    Отключённые метрики: ничего не измеряют и не выделяют память на вызов
+    """
+    enabled: bool = False
+    _null_context = nullcontext()
+
+    def timer(self, stage: str):  # type: ignore[override]
+        return self._null_context
+
+    def count(self, name: str, n: int = 1) -> None:
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+class MetricsAggregator:
+    """
+    Сводные гистограммы времени этапов и суммы счётчиков по многим изображениям
+    """
+    def __init__(self) -> None:
+        self.images: int = 0
+        self.histograms: dict[str, list[int]] = {}
+        self.totals: dict[str, float] = {}
+        self.counters: dict[str, int] = {}
+
+    def add(self, timings: dict[str, float], counters: dict[str, int] | None = None) -> None:
+        self.images += 1
+        for stage, seconds in timings.items():
+            histogram = self.histograms.setdefault(stage, [0] * (len(HISTOGRAM_BOUNDS) + 1))
+            histogram[bisect_right(HISTOGRAM_BOUNDS, seconds)] += 1
+            self.totals[stage] = self.totals.get(stage, 0.0) + seconds
+        for name, n in (counters or {}).items():
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def quantile(self, stage: str, q: float) -> float:
+        """
+        Оценка квантиля по гистограмме (верхняя граница корзины)
+        """
+        histogram = self.histograms.get(stage)
+        if not histogram:
+            return 0.0
+        target = q * sum(histogram)
+        seen = 0
+        for i, n in enumerate(histogram):
+            seen += n
+            if seen >= target and n:
+                return HISTOGRAM_BOUNDS[min(i, len(HISTOGRAM_BOUNDS) - 1)]
+        return HISTOGRAM_BOUNDS[-1]
+
+    def summary(self) -> dict[str, Any]:
+        stages = {
+            stage: {
+                'count': sum(histogram),
+                'mean': self.totals[stage] / sum(histogram),
+                'p50': self.quantile(stage, 0.5),
+                'p95': self.quantile(stage, 0.95),
+                'histogram': histogram,
+            }
+            for stage, histogram in self.histograms.items()
+        }
+        return {
+            'images': self.images,
+            'bucket_bounds': HISTOGRAM_BOUNDS,
+            'stages': stages,
+            'counters': dict(self.counters),
+        }
@@ -1,16 +1,24 @@
-from PySide6.QtWidgets import QFileDialog, QMainWindow, QMessageBox, QVBoxLayout
+import os
+
+from PySide6.QtCore import QThreadPool, Qt
+from PySide6.QtWidgets import (
+    QAbstractItemView, QFileDialog, QHeaderView, QMainWindow, QMessageBox, QProgressBar, QPushButton,
+    QTableWidget, QTableWidgetItem, QToolButton, QVBoxLayout,
+)
 import cv2
 from cv2.typing import MatLike
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg
 from matplotlib.backends.backend_qtagg import NavigationToolbar2QT
 
-from src.carnum import BoundingBox, NumberDetector
-from src.carnum import CharRecognizer
-from src.carnum import CharSegmenter
+from src.carnum.batch_runner import collect_image_paths
+from src.carnum.gui_tasks import DebugView, DebugViewTask, RecognizeTask, TaskSignals
+from src.carnum.pipeline import Pipeline, PipelineResult
 
 from .ui.ui_main_window import Ui_MainWindow
 
+RESULT_COLUMNS = ('Файл', 'Номер', 'Формат', 'Уверенность', 'Время, мс', 'Ошибка')
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -21,7 +29,20 @@ class MainWindow(QMainWindow):
         self.ui.select_path.clicked.connect(self.select_path)
         self.ui.pushButton.clicked.connect(self.start)
 
+        # Распознавание идёт в пуле потоков, окно только принимает результаты через сигналы
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(os.cpu_count() or 1)
+        self.signals = TaskSignals(self)
+        self.signals.result.connect(self.add_result)
+        self.signals.debug_view.connect(self.show_debug_view)
+        self.signals.failed.connect(self.show_error)
+        # Номер текущего пакета: результаты отменённых пакетов отбрасываются
+        self.batch_id = 0
+        self.pending = 0
+        self.pipeline: Pipeline | None = None
+
         self.setup_plot()
+        self.setup_batch()
 
     def setup_plot(self):
         self.figure = Figure()
@@ -32,25 +53,70 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.canvas)
         layout.addWidget(self.toolbar)
 
-    def imshow(self, edges: MatLike, contour_img: MatLike, number_img: MatLike, chars: list[MatLike]):
+    def setup_batch(self):
+        """
+        Выбор папки, прогресс, отмена и таблица результатов пакетной обработки
+        """
+        self.select_folder_button = QToolButton(self.ui.groupBox)
+        self.select_folder_button.setText('Папка...')
+        self.select_folder_button.clicked.connect(self.select_folder)
+        self.ui.horizontalLayout_4.addWidget(self.select_folder_button)
+
+        self.progress = QProgressBar(self.ui.control_widget)
+        self.progress.setFormat('%v / %m')
+        self.progress.setValue(0)
+
+        self.cancel_button = QPushButton('Отменить', self.ui.control_widget)
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_batch)
+
+        self.results_table = QTableWidget(0, len(RESULT_COLUMNS), self.ui.control_widget)
+        self.results_table.setHorizontalHeaderLabels(RESULT_COLUMNS)
+        self.results_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.results_table.horizontalHeader().setStretchLastSection(True)
+        self.results_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.results_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.results_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.results_table.setSortingEnabled(True)
+        self.results_table.cellClicked.connect(self.show_row)
+
+        # Таблица занимает свободное место вместо распорки
+        self.ui.verticalLayout.removeItem(self.ui.verticalSpacer)
+        self.ui.verticalLayout.addWidget(self.progress)
+        self.ui.verticalLayout.addWidget(self.cancel_button)
+        self.ui.verticalLayout.addWidget(self.results_table)
+
+    def imshow(
+        self,
+        edges: MatLike,
+        contour_img: MatLike,
+        number_img: MatLike,
+        boxes_img: MatLike,
+        chars: list[MatLike],
+    ):
         self.figure.clear()
-        ax1 = self.figure.add_subplot(231)
+        ax1 = self.figure.add_subplot(241)
         ax1.set_xticks([]), ax1.set_yticks([])
         ax1.set_title('Выделенные границы')
-        ax2 = self.figure.add_subplot(232)
+        ax2 = self.figure.add_subplot(242)
         ax2.set_xticks([]), ax2.set_yticks([])
         ax2.set_title('Найденный контур номера')
-        ax3 = self.figure.add_subplot(233)
+        ax3 = self.figure.add_subplot(243)
         ax3.set_xticks([]), ax3.set_yticks([])
         ax3.set_title('Вырезанный номер')
+        ax4 = self.figure.add_subplot(244)
+        ax4.set_xticks([]), ax4.set_yticks([])
+        ax4.set_title('Символы на бинарном номере')
 
         ax1.imshow(edges, cmap='gray')
         ax2.imshow(contour_img, cmap='gray')
         ax3.imshow(number_img, cmap='gray')
+        ax4.imshow(cv2.cvtColor(boxes_img, cv2.COLOR_BGR2RGB))
 
         n = len(chars)
         if len(chars) == 0:
             print('No characters found')
+            self.canvas.draw()
             return
 
         for i in range(1, n + 1):
@@ -69,60 +135,110 @@ class MainWindow(QMainWindow):
         if file_path:
             self.ui.input_path.setText(file_path)
 
-    def load_templates(self) -> dict[str, MatLike]:
-        templates: dict[str, MatLike] = {}
-        for d in '0123456789':
-            path = f'img/templates/{d}.png'
-            img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
-            if img is not None:
-                templates[d] = img
-        return templates
-
-    def draw_contour_and_bbox(self, img: MatLike, contour: MatLike, bbox: BoundingBox) -> tuple[MatLike, MatLike]:
-        """
-        Рисуем контуры и bounding boxes на изображении
-        """
-        # Создаем копии для визуализации
-        contour_img = img.copy()
-        bbox_img = img.copy()
-
-        # Рисуем все найденные контуры
-        cv2.drawContours(contour_img, [contour], -1, (0, 255, 0), 3)
-
-        cv2.rectangle(bbox_img, (bbox.x, bbox.y), (bbox.x + bbox.w, bbox.y + bbox.h), (0, 255, 0), 3)
-
-        return contour_img, bbox_img
+    def select_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, 'Выберите папку с изображениями')
+        if folder:
+            self.ui.input_path.setText(folder)
 
     def start(self):
-        file_path = self.ui.input_path.text()
-        if not file_path:
+        path = self.ui.input_path.text()
+        if not path:
             QMessageBox.warning(self, 'Ошибка', 'Путь к изображению не указан')
             return
 
-        try:
-            img = cv2.imread(file_path, cv2.IMREAD_GRAYSCALE)
+        if os.path.isdir(path):
+            self.start_batch(list(collect_image_paths([path])))
+        else:
+            self.pool.start(DebugViewTask(self.get_pipeline(), path, self.signals))
 
-            assert img is not None, 'file could not be read, check with os.path.exists()'
-
-            detector = NumberDetector(img)
-
-            number_candidate = detector.detect_number()
+    def get_pipeline(self) -> Pipeline:
+        """
+        Один Pipeline и для пакета, и для окна отладки: отладка показывает то же прочтение
+        """
+        if self.pipeline is None:
+            self.pipeline = Pipeline(collect_metrics=False)
+        return self.pipeline
 
-            assert number_candidate is not None, 'Не удалось распознать номер'
+    def start_batch(self, paths: list[str]):
+        if not paths:
+            QMessageBox.warning(self, 'Ошибка', 'В папке нет изображений')
+            return
 
-            x, y, w, h = number_candidate.bbox
-            number_img = detector.img[y:y + h, x:x + w]
+        pipeline = self.get_pipeline()
+        self.cancel_batch()
+        self.batch_id += 1
+        self.pending = len(paths)
+        self.results_table.setRowCount(0)
+        self.progress.setRange(0, len(paths))
+        self.progress.setValue(0)
+        self.cancel_button.setEnabled(True)
 
-            segmenter = CharSegmenter(number_img)
+        for path in paths:
+            self.pool.start(RecognizeTask(pipeline, path, self.batch_id, self.signals))
 
-            chars = segmenter.segment_characters()
+    def cancel_batch(self):
+        """
+        Снимает с очереди необработанные файлы. Уже начатые дорабатывают,
+        но их результаты отбрасываются по номеру пакета
+        """
+        if self.pending:
+            self.pool.clear()
+            self.batch_id += 1
+            self.pending = 0
+        self.cancel_button.setEnabled(False)
+
+    def add_result(self, batch_id: int, result: PipelineResult, elapsed_ms: float):
+        if batch_id != self.batch_id:
+            return
 
-            recognizer = CharRecognizer(chars, self.load_templates())
+        self.pending -= 1
+        self.progress.setValue(self.progress.value() + 1)
+        if self.pending == 0:
+            self.cancel_button.setEnabled(False)
+
+        # Пока вставляем строку, сортировка отключена, иначе ячейки разъедутся по разным строкам
+        self.results_table.setSortingEnabled(False)
+        row = self.results_table.rowCount()
+        self.results_table.insertRow(row)
+
+        path_item = QTableWidgetItem(os.path.basename(result.path))
+        path_item.setData(Qt.ItemDataRole.UserRole, result.path)
+        path_item.setToolTip(result.path)
+        time_item = QTableWidgetItem()
+        time_item.setData(Qt.ItemDataRole.DisplayRole, round(elapsed_ms, 1))
+        confidence_item = QTableWidgetItem()
+        if result.confidence is not None:
+            confidence_item.setData(Qt.ItemDataRole.DisplayRole, round(result.confidence, 2))
+            # Подсказка: варианты самого слабого символа и его отрыв от второго варианта
+            reading = result.reading
+            if (position := reading.weakest) is not None:
+                weakest = reading.chars[position]
+                alternatives = ', '.join(f'{char} {score:.2f}' for char, score in weakest.alternatives)
+                confidence_item.setToolTip(f'Символ {position + 1}: {alternatives} (отрыв {weakest.margin:.2f})')
+
+        self.results_table.setItem(row, 0, path_item)
+        self.results_table.setItem(row, 1, QTableWidgetItem(result.number or ''))
+        self.results_table.setItem(row, 2, QTableWidgetItem(result.format or 'нет'))
+        self.results_table.setItem(row, 3, confidence_item)
+        self.results_table.setItem(row, 4, time_item)
+        self.results_table.setItem(row, 5, QTableWidgetItem(result.error or ''))
+        self.results_table.setSortingEnabled(True)
+
+    def show_row(self, row: int, _column: int):
+        """
+        Изображения отладки строятся только для выбранной строки
+        """
+        path = self.results_table.item(row, 0).data(Qt.ItemDataRole.UserRole)
+        self.pool.start(DebugViewTask(self.get_pipeline(), path, self.signals))
 
-            self.ui.output_number.setText(recognizer.recognize())
+    def show_debug_view(self, view: DebugView):
+        self.ui.output_number.setText(view.number)
+        self.imshow(view.edges, view.contour_img, view.number_img, view.boxes_img, view.chars)
 
-            contour_img, _ = self.draw_contour_and_bbox(detector.img, number_candidate.contour, number_candidate.bbox)
+    def show_error(self, path: str, message: str):
+        QMessageBox.critical(self, 'Ошибка', f'{os.path.basename(path)}: {message}')
 
-            self.imshow(detector.edges, contour_img, number_img, chars)
-        except Exception as e:
-            QMessageBox.critical(self, 'Ошибка', str(e))
+    def closeEvent(self, event):
+        self.cancel_batch()
+        self.pool.waitForDone()
+        super().closeEvent(event)
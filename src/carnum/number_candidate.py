@@ -3,10 +3,10 @@ from typing import override
 
 from cv2.typing import MatLike
 
-from src.carnum import BoundingBox
+from src.carnum.bounding_box import BoundingBox
 
 
-@dataclass
+@dataclass(slots=True)
 class NumberCandidate:
     contour: MatLike
     bbox: BoundingBox
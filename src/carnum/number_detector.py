@@ -1,8 +1,53 @@
+from collections import deque
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import Executor, Future
+from typing import TypeVar
+
 import cv2
 from cv2.typing import MatLike
-
-from src.carnum import BoundingBox
-from src.carnum import NumberCandidate
+import numpy as np
+
+from src.carnum.bounding_box import BoundingBox
+from src.carnum.candidate_set import CandidateSet
+from src.carnum.number_candidate import NumberCandidate
+from src.carnum.instrumentation import NULL_METRICS, Metrics, logger
+from src.carnum.plate_format import PlateFormats, load_plate_formats
+from src.carnum.scratch_buffers import ScratchBuffers
+
+P = TypeVar('P')
+T = TypeVar('T')
+
+
+def score_candidates(
+    aspect_ratio: np.ndarray,
+    area_ratio: np.ndarray,
+    center_y_ratio: np.ndarray,
+    contour_points: np.ndarray,
+    formats: PlateFormats | None = None,
+) -> np.ndarray:
+    """
+    Оценка правдоподобия кандидатов сразу для массива контуров
+    """
+    # 1. Соотношение сторон (самый важный критерий): лучшая ступень среди всех форматов
+    score = (formats or load_plate_formats()).aspect_score(aspect_ratio)
+
+    # 2. Площадь
+    score += np.select(
+        [
+            (area_ratio >= 0.005) & (area_ratio <= 0.05),
+            (area_ratio >= 0.001) & (area_ratio <= 0.1),
+        ],
+        [3, 1],
+        0,
+    )
+
+    # 3. Положение
+    score += np.where(center_y_ratio > 0.4, 2, 0)
+
+    # 5. Форма контура
+    score += np.where((contour_points >= 4) & (contour_points <= 6), 2, 0)
+
+    return score
 
 
 class NumberDetector:
@@ -14,46 +59,202 @@ class NumberDetector:
         target_img_width: int = 1920,
         target_img_height: int = 1080,
         dilation_kernel_size: int = 3,
+        canny_threshold1: float = 100,
+        canny_threshold2: float = 200,
+        min_contour_area: float = 1000,
+        coarse_to_fine: bool = False,
+        coarse_img_width: int = 640,
+        refine_candidates: int = 3,
+        max_candidates: int = 50,
+        rois: Sequence[BoundingBox] | None = None,
+        roi_min_score: int = 7,
+        scratch: ScratchBuffers | None = None,
+        formats: PlateFormats | None = None,
+        executor: Executor | None = None,
+        metrics: Metrics | None = None,
+        preprocessed: tuple[MatLike, float, MatLike] | None = None,
     ):
         self.img: MatLike = img
+        self.source: MatLike = img
         self.edges: MatLike
+        self.scale: float = 1.0
+        self.metrics: Metrics = metrics or NULL_METRICS
+        # Буферы для полноразмерных этапов обычного режима; без них каждый этап выделяет новый массив
+        self.scratch: ScratchBuffers | None = scratch
+        # Форматы номеров задают ожидаемые пропорции пластины
+        self.formats: PlateFormats = formats or load_plate_formats()
+        # Пул потоков: области интереса уточняются одновременно, кандидаты обрабатываются наперёд
+        self.executor: Executor | None = executor
+        # Готовые (улучшенное изображение, масштаб, границы) для поиска по всему кадру:
+        # подбор параметров считает их один раз для всех конфигураций с теми же порогами
+        self.preprocessed: tuple[MatLike, float, MatLike] | None = preprocessed
 
         self.contrast_clip_limit: float = contrast_clip_limit
         self.contrast_kernel_size: int = contrast_kernel_size
         self.target_img_width: int = target_img_width
         self.target_img_height: int = target_img_height
         self.dilation_kernel_size: int = dilation_kernel_size
+        self.canny_threshold1: float = canny_threshold1
+        self.canny_threshold2: float = canny_threshold2
+
+        self.coarse_to_fine: bool = coarse_to_fine
+        self.coarse_img_width: int = coarse_img_width
+        self.refine_candidates: int = refine_candidates
+        # Области интереса от предварительной локализации (ColorLocalizer) в координатах img
+        self.rois: list[BoundingBox] = list(rois or [])
+        # Кандидаты из областей интереса с меньшей оценкой не отдаются: их место занимает поиск по всему кадру
+        self.roi_min_score: int = roi_min_score
+
+        self.min_contour_area: float = min_contour_area
+        # Сколько контуров после дешёвой предварительной оценки проходят аппроксимацию
+        self.max_candidates: int = max_candidates
+        # Во сколько раз увеличивать вырезку номера (в режиме coarse_to_fine self.img не увеличивается)
+        self.crop_scale: float = 1.0
 
     def detect_number(self) -> NumberCandidate | None:
-        self.__preprocess_img()
-        candidates = self.__find_number_candidates()
-        return self.__select_best_candidate(candidates)
+        return next(self.iter_candidates(), None)
+
+    def iter_candidates(self) -> Iterator[NumberCandidate]:
+        """
+        Кандидаты в номер по убыванию оценки. Генератор ленивый: изображение
+        обрабатывается при первом next(), дальше только отдаются готовые кандидаты
+        """
+        # Сначала контуры ищутся только в областях интереса; если потребителю их
+        # не хватило, обрабатывается весь кадр, как без локализации. В режиме
+        # coarse_to_fine весь кадр обрабатывается, только если на уменьшенной
+        # копии не нашлось ни одного контура: иначе работа растёт не с площадью
+        # номеров, а с площадью кадра, и режим теряет смысл
+        if self.rois:
+            yield from self.__rank_candidates(self.__refine_regions(self.rois), self.roi_min_score)
+            self.img, self.crop_scale = self.source, 1.0
+
+        if self.coarse_to_fine:
+            refined = self.__detect_coarse_to_fine()
+            if refined is not None:
+                yield from self.__rank_candidates(refined, self.roi_min_score)
+                return
+            self.img, self.crop_scale = self.source, 1.0
+
+        edges = None
+        if self.preprocessed is not None:
+            self.img, self.scale, edges = self.preprocessed
+        else:
+            self.preprocess()
+        yield from self.__rank_candidates(self.__find_preprocessed(edges))
+
+    def iter_evaluated(
+        self,
+        prepare: Callable[[NumberCandidate], P],
+        evaluate: Callable[[P], T],
+        window: int,
+    ) -> Iterator[T]:
+        """
+        Результаты evaluate для кандидатов по убыванию оценки.
+
+        prepare вызывается в текущем потоке сразу после получения кандидата,
+        пока self.img и crop_scale соответствуют ему (вырезка номера), а
+        evaluate (сегментация, распознавание) — в пуле executor. Пока первый
+        из ожидающих результатов не готов, следующие кандидаты (всего до window)
+        отправляются в пул наперёд. Без executor всё идёт по очереди
+        """
+        candidates = self.iter_candidates()
+        if self.executor is None or window <= 1:
+            while True:
+                with self.metrics.timer('detect'):
+                    candidate = next(candidates, None)
+                if candidate is None:
+                    return
+                yield evaluate(prepare(candidate))
+
+        pending: deque[Future[T]] = deque()
+        exhausted = False
+        try:
+            while True:
+                # Следующий кандидат берём, только пока ждать всё равно приходится
+                while not exhausted and len(pending) < window and not (pending and pending[0].done()):
+                    with self.metrics.timer('detect'):
+                        candidate = next(candidates, None)
+                    if candidate is None:
+                        exhausted = True
+                        break
+                    pending.append(self.executor.submit(evaluate, prepare(candidate)))
+                if not pending:
+                    return
+                yield pending.popleft().result()
+        finally:
+            # Потребителю хватило: кандидаты, которые ещё не начали обрабатываться, не нужны
+            for future in pending:
+                future.cancel()
+
+    def crop_number(self, candidate: NumberCandidate) -> MatLike:
+        """
+        Вырезает номер из обработанного изображения
+        """
+        x, y, w, h = candidate.bbox
+        number_img = self.img[y:y + h, x:x + w]
+        if self.crop_scale > 1:
+            number_img = cv2.resize(
+                number_img, None, fx=self.crop_scale, fy=self.crop_scale, interpolation=cv2.INTER_CUBIC,
+            )
+        return number_img
 
-    def __preprocess_img(self) -> None:
-        self.__enhance_contrast()
-        self.img = cv2.bilateralFilter(self.img, 3, 25, 75)
-        self.img, _ = self.resize_to_target(self.img)
+    def preprocess(self) -> None:
+        """
+        Улучшение контраста и приведение к целевому размеру (меняет self.img и self.scale)
+        """
+        self.img = self.__enhance(self.img, reuse=True)
+        self.img, self.scale = self.resize_to_target(self.img, reuse=True)
+
+    def __find_preprocessed(self, edges: MatLike | None = None) -> CandidateSet:
+        self.edges = edges if edges is not None else self.find_edges(self.img, reuse=True)
+        return self.__find_contours(self.edges, self.min_contour_area)
 
-    def __find_number_candidates(self) -> list[NumberCandidate]:
-        self.edges = cv2.Canny(self.img, 100, 200)
-        self.__morphology_dilation()
-        return self.__find_contours()
+    def __enhance(self, img: MatLike, tile_grid: tuple[int, int] | None = None, reuse: bool = False) -> MatLike:
+        img = self.__enhance_contrast(img, tile_grid, reuse)
+        with self.metrics.timer('bilateral'):
+            # Билатеральный фильтр не работает на месте, поэтому у него свой буфер
+            return cv2.bilateralFilter(img, 3, 25, 75, dst=self.__dst('bilateral', img.shape, reuse))
+
+    def find_edges(self, img: MatLike, reuse: bool = False) -> MatLike:
+        """
+        Границы Canny с утолщением. С reuse=True результат пишется в буферы
+        scratch и перезаписывается следующим изображением
+        """
+        with self.metrics.timer('canny'):
+            edges = cv2.Canny(
+                img, self.canny_threshold1, self.canny_threshold2, edges=self.__dst('canny', img.shape, reuse),
+            )
+        return self.__morphology_dilation(edges, reuse)
 
-    def __enhance_contrast(self) -> None:
+    def __dst(self, name: str, shape: tuple[int, ...], reuse: bool) -> np.ndarray | None:
+        """
+        Буфер для dst-аргумента OpenCV или None, если новый массив выделит сам этап
+        """
+        if not reuse or self.scratch is None:
+            return None
+        return self.scratch.get(name, shape)
+
+    def __enhance_contrast(
+        self,
+        img: MatLike,
+        tile_grid: tuple[int, int] | None = None,
+        reuse: bool = False,
+    ) -> MatLike:
         """
         Улучшение контрастности
         """
         # CLAHE для улучшения локального контраста
-        clahe = cv2.createCLAHE(self.contrast_clip_limit, (self.contrast_kernel_size, self.contrast_kernel_size))
-        self.img = clahe.apply(self.img)
+        clahe = cv2.createCLAHE(self.contrast_clip_limit, tile_grid or (self.contrast_kernel_size, self.contrast_kernel_size))
+        with self.metrics.timer('clahe'):
+            return clahe.apply(img, dst=self.__dst('clahe', img.shape, reuse))
 
-    def resize_to_target(self, img: MatLike) -> tuple[MatLike, float]:
+    def resize_to_target(self, img: MatLike, reuse: bool = False) -> tuple[MatLike, float]:
         """
         Приведение изображения к целевому размеру с сохранением пропорций
         """
         height, width = img.shape[:2]
 
-        print(f'Исходный размер: {width}x{height}')
+        logger.debug('Исходный размер: %dx%d', width, height)
 
         scale_x = self.target_img_width / width
         scale_y = self.target_img_height / height
@@ -61,109 +262,232 @@ class NumberDetector:
         scale = min(scale_x, scale_y)
 
         if scale <= 1:
-            print('Изображение уже больше целевого размера, оставляем как есть')
+            logger.debug('Изображение уже больше целевого размера, оставляем как есть')
             return img, 1.0
 
         new_width = int(width * scale)
         new_height = int(height * scale)
 
-        print(f'Новый размер: {new_width}x{new_height}, масштаб: {scale:.2f}')
+        logger.debug('Новый размер: %dx%d, масштаб: %.2f', new_width, new_height, scale)
 
-        img = cv2.resize(img, (new_width, new_height), interpolation=cv2.INTER_CUBIC)
+        with self.metrics.timer('resize'):
+            img = cv2.resize(
+                img, (new_width, new_height), dst=self.__dst('resize', (new_height, new_width), reuse),
+                interpolation=cv2.INTER_CUBIC,
+            )
 
         return img, scale
 
-    def __morphology_dilation(self) -> None:
+    def __morphology_dilation(self, edges: MatLike, reuse: bool = False) -> MatLike:
         """
          Утолщение границ с помощью морфологической дилатации
         """
         kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (self.dilation_kernel_size, self.dilation_kernel_size))
-        self.edges = cv2.dilate(self.edges, kernel, iterations=1)
+        with self.metrics.timer('dilation'):
+            # Границы Canny дальше не нужны: с буферами утолщаем их на месте
+            dst = edges if reuse and self.scratch is not None else None
+            return cv2.dilate(edges, kernel, dst=dst, iterations=1)
 
-    def __find_contours(self) -> list[NumberCandidate]:
+    def __detect_coarse_to_fine(self) -> CandidateSet | None:
         """
-        Поиск контуров-кандидатов в номерные пластины
+        Поиск от грубого к точному: кандидаты ищутся на уменьшенной копии,
+        а уточняются только вырезки вокруг лучших из них в полном разрешении.
+        None — на уменьшенной копии нет ни одного контура.
+
+        Экспериментальный режим, в CLI его нет: на img/ он быстрее обычного
+        примерно на 20%, но читает 2/17 номеров и 41/141 символов против 3/17 и 54/141
         """
-        contours, _ = cv2.findContours(
-            self.edges, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE,
+        full = self.source
+        height, width = full.shape[:2]
+
+        # Порог площади подобран под масштаб обычного режима (увеличение до целевого размера)
+        target_scale = max(1.0, min(self.target_img_width / width, self.target_img_height / height))
+
+        coarse_scale = min(1.0, self.coarse_img_width / width)
+        coarse = full
+        if coarse_scale < 1:
+            with self.metrics.timer('resize'):
+                coarse = cv2.resize(full, None, fx=coarse_scale, fy=coarse_scale, interpolation=cv2.INTER_AREA)
+        coarse_edges = self.find_edges(self.__enhance(coarse))
+        coarse_candidates = self.__find_contours(
+            coarse_edges, self.min_contour_area * (coarse_scale / target_scale) ** 2,
         )
 
-        print(f'Найдено контуров: {len(contours)}')
+        coarse_h, coarse_w = coarse.shape[:2]
+        # Номер не бывает шире половины кадра, такие контуры не стоят уточнения
+        coarse_candidates = coarse_candidates.take(np.flatnonzero(coarse_candidates.boxes[:, 2] <= coarse_w * 0.5))
+        coarse_scores = self.__score_candidates(coarse_candidates, coarse_w, coarse_h)
+        if not len(coarse_candidates):
+            return None
+        ranked = coarse_candidates.take(np.argsort(-coarse_scores, kind='stable')[:self.refine_candidates])
 
-        contours = sorted(contours, key=cv2.contourArea, reverse=True)
+        return self.__refine_regions([BoundingBox(*box) for box in ranked.boxes.tolist()], coarse_scale)
 
-        candidates: list[NumberCandidate] = []
+    def __refine_regions(self, regions: Sequence[BoundingBox], region_scale: float = 1.0) -> CandidateSet:
+        """
+        Поиск контуров в полном разрешении только вокруг заданных рамок.
+        Рамки заданы в координатах изображения, уменьшенного в region_scale раз.
+        Меняет self.img (улучшенные вырезки на исходном кадре), self.edges,
+        self.scale и self.crop_scale; кандидаты отдаются в координатах кадра
+        """
+        full = self.source
+        height, width = full.shape[:2]
+        # Вырезки увеличиваются до масштаба обычного режима (увеличение до целевого размера)
+        target_scale = max(1.0, min(self.target_img_width / width, self.target_img_height / height))
+
+        self.img = full.copy()
+        self.edges = np.zeros_like(full)
+        self.scale = 1.0
+        self.crop_scale = target_scale
+
+        def refine(region: BoundingBox) -> tuple[tuple[int, int, int, int], MatLike, MatLike, CandidateSet]:
+            x, y, w, h = region
+            # Рамка в полном разрешении с запасом: грубый контур мог обрезать края номера
+            dx, dy = w * 0.5, max(h, w * 0.35)
+            x0 = max(0, int((x - dx) / region_scale))
+            y0 = max(0, int((y - dy) / region_scale))
+            x1 = min(width, int((x + w + dx) / region_scale) + 1)
+            y1 = min(height, int((y + h + dy) / region_scale) + 1)
+
+            enhanced = crop = self.__enhance_region(x0, y0, x1, y1)
+
+            # Вырезку увеличиваем так же, как обычный режим увеличивает весь кадр,
+            # чтобы пороги Canny и площади работали одинаково
+            if target_scale > 1:
+                with self.metrics.timer('resize'):
+                    crop = cv2.resize(crop, None, fx=target_scale, fy=target_scale, interpolation=cv2.INTER_CUBIC)
+            crop_edges = self.find_edges(crop)
+            edges = cv2.resize(crop_edges, (x1 - x0, y1 - y0), interpolation=cv2.INTER_NEAREST)
+
+            frame = (width, height, x0, y0, 1 / target_scale)
+            candidates = self.__find_contours(crop_edges, self.min_contour_area, frame)
+            return (x0, y0, x1, y1), enhanced, edges, candidates.transformed(1 / target_scale, x0, y0)
+
+        # Области читают только исходный кадр, поэтому их можно уточнять одновременно;
+        # в self.img и self.edges результаты пишутся по порядку, как при обходе по одной
+        if self.executor is not None and len(regions) > 1:
+            refined = list(self.executor.map(refine, regions))
+        else:
+            refined = [refine(region) for region in regions]
+
+        found: list[CandidateSet] = []
+        for (x0, y0, x1, y1), enhanced, edges, candidates in refined:
+            self.img[y0:y1, x0:x1] = enhanced
+            self.edges[y0:y1, x0:x1] = edges
+            found.append(candidates)
+
+        return CandidateSet.concatenate(found)
+
+    def __enhance_region(self, x0: int, y0: int, x1: int, y1: int) -> MatLike:
+        """
+        Улучшение контраста вырезки source[y0:y1, x0:x1] так же, как на целом кадре.
+        CLAHE считает гистограммы по плиткам, поэтому вырезка расширяется до границ
+        плиток целого кадра и ещё на плитку с каждой стороны (края плиток
+        интерполируются по соседям); за краем кадра она дополняется отражением,
+        как это делает CLAHE. Иначе контур номера на вырезке рвётся там, где
+        на целом кадре он замкнут
+        """
+        full = self.source
+        height, width = full.shape[:2]
+        # Размер плитки целого кадра: CLAHE дополняет кадр до кратного числу плиток
+        tile_w = -(-width // self.contrast_kernel_size)
+        tile_h = -(-height // self.contrast_kernel_size)
+        cx0, cy0 = max(0, (x0 // tile_w - 1) * tile_w), max(0, (y0 // tile_h - 1) * tile_h)
+        cx1 = min((-(-x1 // tile_w) + 1) * tile_w, tile_w * self.contrast_kernel_size)
+        cy1 = min((-(-y1 // tile_h) + 1) * tile_h, tile_h * self.contrast_kernel_size)
+
+        context = full[cy0:min(cy1, height), cx0:min(cx1, width)]
+        if cx1 > width or cy1 > height:
+            context = cv2.copyMakeBorder(
+                context, 0, max(0, cy1 - height), 0, max(0, cx1 - width), cv2.BORDER_REFLECT_101,
+            )
+        enhanced = self.__enhance(context, ((cx1 - cx0) // tile_w, (cy1 - cy0) // tile_h))
+        return enhanced[y0 - cy0:y1 - cy0, x0 - cx0:x1 - cx0]
 
-        for i, contour in enumerate(contours):
-            area = cv2.contourArea(contour)
+    def __find_contours(
+        self,
+        edges: MatLike,
+        min_area: float,
+        frame: tuple[int, int, int, int, float] | None = None,
+    ) -> CandidateSet:
+        """
+        Поиск контуров-кандидатов в номерные пластины.
 
-            if area < 1000:
-                continue
+        Площадь, рамка и соотношение сторон считаются массивами для всех контуров
+        сразу, аппроксимацию многоугольником проходят только max_candidates лучших.
+        frame = (ширина кадра, высота кадра, сдвиг x, сдвиг y, масштаб) задаёт,
+        как координаты edges переводятся в кадр, по которому считается оценка.
+        """
+        with self.metrics.timer('contours'):
+            candidates = self.__select_contours(edges, min_area, frame)
+        self.metrics.count('candidates', len(candidates))
+        return candidates
 
-            perimeter = cv2.arcLength(contour, True)
-            epsilon = 0.02 * perimeter  # Точность аппроксимации
-            approx = cv2.approxPolyDP(contour, epsilon, True)
+    def __select_contours(
+        self,
+        edges: MatLike,
+        min_area: float,
+        frame: tuple[int, int, int, int, float] | None,
+    ) -> CandidateSet:
+        contours, _ = cv2.findContours(
+            edges, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE,
+        )
 
-            x, y, w, h = cv2.boundingRect(approx)
-            aspect_ratio = w / float(h)
+        logger.debug('Найдено контуров: %d', len(contours))
+        self.metrics.count('contours', len(contours))
 
-            candidate = NumberCandidate(
-                approx,
-                BoundingBox(x, y, w, h),
-                area,
-                aspect_ratio,
-            )
+        if not contours:
+            return CandidateSet.empty()
 
-            candidates.append(candidate)
-            print(f'Кандидат {len(candidates)}: {candidate}')
+        areas = np.fromiter((cv2.contourArea(c) for c in contours), dtype=np.float64, count=len(contours))
+        keep = np.flatnonzero(areas >= min_area)
+        if keep.size == 0:
+            return CandidateSet.empty()
 
-        return candidates
+        rects = np.array([cv2.boundingRect(contours[i]) for i in keep], dtype=np.float64)
+        img_width, img_height, dx, dy, scale = frame or (edges.shape[1], edges.shape[0], 0, 0, 1.0)
 
-    def __select_best_candidate(self, candidates: list[NumberCandidate]) -> NumberCandidate | None:
-        if not candidates:
-            return None
+        # Предварительная оценка по рамке исходного контура (форма контура ещё неизвестна)
+        scores = score_candidates(
+            rects[:, 2] / rects[:, 3],
+            areas[keep] * scale ** 2 / (img_width * img_height),
+            ((rects[:, 1] + rects[:, 3] / 2) * scale + dy) / img_height,
+            np.zeros(keep.size),
+            self.formats,
+        )
+        # При равной оценке сохраняем прежний порядок — по убыванию площади
+        order = np.lexsort((-areas[keep], -scores))[:self.max_candidates]
+        selected = keep[order]
+        selected = selected[np.argsort(-areas[selected], kind='stable')]
+
+        polygons = [
+            cv2.approxPolyDP(contours[i], 0.02 * cv2.arcLength(contours[i], True), True)  # Точность аппроксимации
+            for i in selected
+        ]
+        boxes = [cv2.boundingRect(approx) for approx in polygons]
+        return CandidateSet.from_polygons(polygons, boxes, areas[selected])
+
+    def __score_candidates(self, candidates: CandidateSet, img_width: int, img_height: int) -> np.ndarray:
+        boxes = candidates.boxes
+        return score_candidates(
+            candidates.aspect_ratios,
+            candidates.areas / (img_width * img_height),
+            (boxes[:, 1] + boxes[:, 3] / 2) / img_height,
+            candidates.point_counts,
+            self.formats,
+        )
+
+    def __rank_candidates(self, candidates: CandidateSet, min_score: int | None = None) -> Iterator[NumberCandidate]:
+        if not len(candidates):
+            return
 
         img_height, img_width = self.img.shape
-        best_candidate: NumberCandidate | None = None
-        best_score = -1
-
-        for candidate in candidates:
-            score = 0
-            bbox = candidate.bbox
-
-            aspect_ratio = candidate.aspect_ratio
-            area = candidate.area
-            img_area = img_width * img_height
-            area_ratio = area / img_area
-
-            # 1. Соотношение сторон (самый важный критерий)
-            if 4.0 <= aspect_ratio <= 5.0:
-                score += 4
-            elif 3.5 <= aspect_ratio <= 5.5:
-                score += 2
-            elif 2.5 <= aspect_ratio <= 6.0:
-                score += 1
-
-            # 2. Площадь
-            if 0.005 <= area_ratio <= 0.05:
-                score += 3
-            elif 0.001 <= area_ratio <= 0.1:
-                score += 1
-
-            # 3. Положение
-            center_y = bbox.y + bbox.h / 2
-            if center_y > img_height * 0.4:
-                score += 2
-
-            # 5. Форма контура
-            if 4 <= len(candidate.contour) <= 6:
-                score += 2
-
-            if score > best_score:
-                best_score = score
-                best_candidate = candidate
-
-        if best_candidate:
-            print(f'Лучший кандидат: {best_candidate}, score: {best_score}')
-
-        return best_candidate
+        scores = self.__score_candidates(candidates, img_width, img_height)
+        # Устойчивая сортировка: первым идёт первый максимум, как у прежнего прохода со строгим сравнением.
+        # Объекты NumberCandidate создаются только для тех кандидатов, до которых дошёл потребитель
+        for rank, i in enumerate(np.argsort(-scores, kind='stable')):
+            if min_score is not None and scores[i] < min_score:
+                return
+            candidate = candidates.candidate(i)
+            logger.debug('Кандидат #%d: %s, score: %d', rank, candidate, int(scores[i]))
+            yield candidate
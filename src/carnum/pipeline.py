@@ -0,0 +1,610 @@
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import Executor
+from dataclasses import asdict, dataclass, field
+from functools import partial
+import hashlib
+import json
+import threading
+import time
+from typing import Any
+
+import cv2
+from cv2.typing import MatLike
+import numpy as np
+
+from src.carnum.bounding_box import BoundingBox
+from src.carnum.char_recognizer import CharRecognizer
+from src.carnum.char_segmenter import CharSegmenter
+from src.carnum.color_localizer import ColorLocalizer
+from src.carnum.number_candidate import NumberCandidate
+from src.carnum.number_detector import NumberDetector
+from src.carnum.template_bank import TemplateBank
+from src.carnum.template_bank import get_template_bank
+from src.carnum.char_recognizer import LetterBackend
+from src.carnum.instrumentation import NULL_METRICS, Metrics
+from src.carnum.pipeline_config import PipelineConfig
+from src.carnum.plate_format import PlateFormats, load_plate_formats
+from src.carnum.plate_normalizer import PlateNormalizer
+from src.carnum.plate_reading import CharReading, PlateReading
+from src.carnum.prescreen import PlatePrescreen
+from src.carnum.result_cache import ResultCache, cache_key
+from src.carnum.scratch_buffers import ScratchBuffers
+from src.carnum.thread_pool import shared_thread_pool
+
+
+@dataclass
+class PipelineResult:
+    path: str
+    number: str | None = None
+    bbox: BoundingBox | None = None
+    timings: dict[str, float] = field(default_factory=dict)
+    counters: dict[str, int] = field(default_factory=dict)
+    error: str | None = None
+    # Уверенность номера (оценка самого слабого символа) и прочтение по символам
+    confidence: float | None = None
+    # Формат, которому соответствует номер (None — ни одному из активных)
+    format: str | None = None
+    chars: list[CharReading] = field(default_factory=list)
+
+    @property
+    def reading(self) -> PlateReading:
+        """
+        Прочтение номера по символам (уверенность, самый слабый символ)
+        """
+        return PlateReading(self.chars, self.format)
+
+    def to_dict(self) -> dict[str, Any]:
+        value = asdict(self)
+        value['chars'] = [reading.to_dict() for reading in self.chars]
+        return value
+
+    def to_cache(self) -> dict[str, Any]:
+        """
+        Только то, что зависит от изображения и настроек (без времени этапов)
+        """
+        return {
+            'number': self.number,
+            'bbox': list(self.bbox) if self.bbox is not None else None,
+            'error': self.error,
+            'confidence': self.confidence,
+            'format': self.format,
+            'chars': [reading.to_dict() for reading in self.chars],
+        }
+
+    @classmethod
+    def from_cache(cls, path: str, value: dict[str, Any]) -> 'PipelineResult':
+        bbox = BoundingBox(*value['bbox']) if value['bbox'] is not None else None
+        chars = [CharReading.from_dict(reading) for reading in value.get('chars', [])]
+        return cls(
+            path, value['number'], bbox, error=value['error'],
+            confidence=value.get('confidence'), format=value.get('format'), chars=chars,
+        )
+
+    def apply(self, read: '_CandidateRead') -> None:
+        assert read.reading is not None
+        self.bbox, self.number = read.bbox, read.reading.text
+        self.confidence, self.chars = read.reading.confidence, read.reading.chars
+        self.format = read.reading.format
+
+
+class Pipeline:
+    """
+    Цепочка NumberDetector -> CharSegmenter -> CharRecognizer без GUI.
+
+    Пороги этапов берутся из config, явные detector_params их переопределяют.
+    С cache_path результаты запоминаются по хэшу байтов изображения и настроек
+    (для уже декодированных изображений — по пикселям, размеру и областям поиска).
+    С localizer изображения читаются в цвете, и контуры сначала ищутся только
+    в предложенных им областях. С prescreen кадры без похожих на номер областей
+    отбрасываются по уменьшенной копии, до полного декодирования и обработки.
+    С min_confidence неуверенные прочтения, как и прочтения не в формате номера,
+    перепроверяются следующими кандидатами (не больше max_reads).
+    formats — активные форматы номеров (по умолчанию российский): по ним
+    оцениваются пропорции кандидатов, раскладка символов и проверка текста.
+    С threads > 0 этапы одного изображения идут в общем пуле потоков: области
+    интереса уточняются одновременно, а следующие кандидаты сегментируются и
+    распознаются, пока проверяется текущий. Результат от этого не меняется
+    """
+    def __init__(
+        self,
+        templates: TemplateBank | None = None,
+        templates_dir: str = 'img/templates',
+        letter_backend: LetterBackend = 'template',
+        collect_metrics: bool = True,
+        config: PipelineConfig | None = None,
+        cache_path: str | None = None,
+        cache_size: int = 100_000,
+        max_reads: int = 5,
+        min_confidence: float | None = None,
+        normalizer: PlateNormalizer | None = None,
+        localizer: ColorLocalizer | None = None,
+        prescreen: PlatePrescreen | None = None,
+        formats: PlateFormats | None = None,
+        threads: int = 0,
+        reuse_buffers: bool = True,
+        **detector_params: Any,
+    ) -> None:
+        self.templates: TemplateBank = templates if templates is not None else get_template_bank(templates_dir)
+        self.letter_backend: LetterBackend = letter_backend
+        self.collect_metrics: bool = collect_metrics
+        self.config: PipelineConfig = config or PipelineConfig()
+        self.detector_params: dict[str, Any] = {**self.config.detector_params(), **detector_params}
+        self.formats: PlateFormats = formats or load_plate_formats()
+        self.segmenter_params: dict[str, Any] = {
+            **self.config.segmenter_params(), 'max_char_width': self.formats.max_char_width,
+        }
+        self.cache: ResultCache | None = ResultCache(cache_path, cache_size) if cache_path else None
+        # Сколько кандидатов читать, пока не найдётся текст в формате номера
+        self.max_reads: int = max(1, max_reads)
+        # Ниже этой уверенности номер считается сомнительным (None — доверять любому номеру в формате)
+        self.min_confidence: float | None = min_confidence
+        # Выравнивание вырезки номера перед сегментацией (по умолчанию — простая вырезка по рамке)
+        self.normalizer: PlateNormalizer | None = normalizer
+        self.localizer: ColorLocalizer | None = localizer
+        self.prescreen: PlatePrescreen | None = prescreen
+        # Пул не влияет на результат, поэтому в отпечаток не входит
+        self.threads: int = threads
+        self.executor: Executor | None = shared_thread_pool(threads) if threads > 0 else None
+        # Локализатору нужен цвет, остальным этапам достаточно яркости
+        self.read_flags: int = cv2.IMREAD_COLOR if localizer is not None else cv2.IMREAD_GRAYSCALE
+        self.__fingerprint: str | None = None
+        # Буферы детектора по потокам и по местам в пачке: изображения одной пачки
+        # живут одновременно, а один Pipeline могут вызывать из нескольких потоков
+        self.reuse_buffers: bool = reuse_buffers
+        self.__local = threading.local()
+
+    def fingerprint(self) -> str:
+        """
+        Всё, от чего зависит результат, кроме самого изображения
+        """
+        if self.__fingerprint is None:
+            templates = hashlib.sha256()
+            for matcher in (self.templates.digits, self.templates.letters):
+                templates.update(''.join(matcher.chars).encode('utf-8'))
+                templates.update(np.ascontiguousarray(matcher.matrix).tobytes())
+            self.__fingerprint = json.dumps({
+                'detector': self.detector_params,
+                'segmenter': self.segmenter_params,
+                'letter_backend': self.letter_backend,
+                'max_reads': self.max_reads,
+                'min_confidence': self.min_confidence,
+                'normalizer': (
+                    [self.normalizer.size, self.normalizer.min_skew] if self.normalizer is not None else None
+                ),
+                'localizer': (
+                    [self.localizer.work_width, self.localizer.max_rois] if self.localizer is not None else None
+                ),
+                'prescreen': (
+                    [self.prescreen.reduction, self.prescreen.min_regions] if self.prescreen is not None else None
+                ),
+                'formats': self.formats.fingerprint(),
+                'templates': templates.hexdigest(),
+            }, sort_keys=True)
+        return self.__fingerprint
+
+    def process_file(self, path: str, debug: dict[str, Any] | None = None) -> PipelineResult:
+        """
+        Обработка файла. Если передан словарь debug, кэш не используется, а в словарь
+        кладутся промежуточные изображения выбранного кандидата (см. process)
+        """
+        metrics = self.new_metrics()
+        if self.cache is not None and debug is None:
+            with metrics.timer('read'):
+                try:
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                except OSError:
+                    return PipelineResult(path, error='file could not be read')
+            return self.process_encoded_batch([(path, data)], [metrics])[0]
+
+        prescreen = self.prescreen
+        if prescreen is not None:
+            rejected = self.__prescreen(lambda: prescreen.read(path), path, metrics)
+            if rejected is not None:
+                return rejected
+
+        with metrics.timer('read'):
+            img = cv2.imread(path, self.read_flags)
+
+        if img is None:
+            return PipelineResult(path, error='file could not be read')
+
+        return self.__process(img, path, metrics, debug=debug)
+
+    def new_metrics(self) -> Metrics:
+        return Metrics() if self.collect_metrics else NULL_METRICS
+
+    def process(
+        self,
+        img: MatLike,
+        path: str = '',
+        metrics: Metrics | None = None,
+        rois: Sequence[BoundingBox] | None = None,
+        preprocessed: tuple[MatLike, float, MatLike] | None = None,
+        debug: dict[str, Any] | None = None,
+    ) -> PipelineResult:
+        """
+        Обработка декодированного изображения. rois — области, с которых
+        начинается поиск (в координатах img, например рамка трека в видео);
+        кандидаты и рамка результата остаются в координатах всего изображения.
+        preprocessed — готовые улучшенное изображение, масштаб и границы для
+        поиска по всему кадру (подбор параметров считает их один раз).
+        Если передан словарь debug, в него кладутся изображения кандидата,
+        попавшего в результат: 'edges' (границы детектора), 'contour' (его контур
+        на обработанном изображении), 'number' (вырезка номера), 'binary',
+        'boxes' (от CharSegmenter) и 'chars' (список изображений символов).
+        С preprocessed или debug кэш не используется
+        """
+        metrics = metrics or self.new_metrics()
+        key = None
+        if self.cache is not None and preprocessed is None and debug is None:
+            with metrics.timer('cache'):
+                key = self.__frame_key(img, rois)
+                cached = self.cache.get(key)
+            if cached is not None:
+                metrics.count('cache_hits')
+                return self.__with_metrics(PipelineResult.from_cache(path, cached), metrics)
+            metrics.count('cache_misses')
+
+        result = None
+        prescreen = self.prescreen
+        if prescreen is not None:
+            result = self.__prescreen(lambda: prescreen.reduce(img), path, metrics)
+        if result is None:
+            result = self.__process(img, path, metrics, rois, preprocessed, debug)
+        if self.cache is not None and key is not None:
+            self.cache.put(key, result.to_cache())
+        return result
+
+    def __frame_key(self, img: MatLike, rois: Sequence[BoundingBox] | None) -> str:
+        """
+        Ключ кэша декодированного изображения: от размера и областей поиска результат тоже зависит
+        """
+        extra = json.dumps({'shape': img.shape, 'rois': [[int(v) for v in roi] for roi in rois or []]})
+        return cache_key(np.ascontiguousarray(img).data, self.fingerprint() + extra)
+
+    def __process(
+        self,
+        img: MatLike,
+        path: str,
+        metrics: Metrics,
+        rois: Sequence[BoundingBox] | None = None,
+        preprocessed: tuple[MatLike, float, MatLike] | None = None,
+        debug: dict[str, Any] | None = None,
+    ) -> PipelineResult:
+        # Изображения отладки собираются только при последовательном чтении кандидатов
+        result, read = self.__locate(
+            img, path, metrics, self.__scratch(0), ahead=debug is None, rois=rois, preprocessed=preprocessed,
+            debug=debug is not None,
+        )
+        if read is not None:
+            if read.reading is None:
+                read.reading = self.__recognizer(read.chars, metrics).read()
+            best = self.__validate(result, read, metrics)
+            if debug is not None and best.debug is not None:
+                debug.update(best.debug, chars=best.chars)
+        return result
+
+    def process_encoded_batch(
+        self,
+        items: Sequence[tuple[str, bytes | memoryview]],
+        metrics: Sequence[Metrics] | None = None,
+    ) -> list[PipelineResult]:
+        """
+        То же, что process_batch, но для закодированных изображений (JPEG, PNG, ...).
+        Найденные в кэше результаты не декодируются и не обрабатываются, а
+        предварительная проверка декодирует изображение сразу уменьшенным
+        """
+        metrics = list(metrics) if metrics is not None else [self.new_metrics() for _ in items]
+        fingerprint = self.fingerprint() if self.cache is not None else ''
+
+        results: list[PipelineResult | None] = [None] * len(items)
+        pending: list[tuple[int, str, MatLike]] = []
+        keys: dict[int, str] = {}
+        for i, ((path, data), item_metrics) in enumerate(zip(items, metrics)):
+            if self.cache is not None:
+                with item_metrics.timer('cache'):
+                    keys[i] = cache_key(data, fingerprint)
+                    cached = self.cache.get(keys[i])
+                if cached is not None:
+                    item_metrics.count('cache_hits')
+                    results[i] = self.__with_metrics(PipelineResult.from_cache(path, cached), item_metrics)
+                    continue
+                item_metrics.count('cache_misses')
+
+            prescreen = self.prescreen
+            if prescreen is not None:
+                rejected = self.__prescreen(lambda: prescreen.decode(data), path, item_metrics)
+                if rejected is not None:
+                    results[i] = rejected
+                    if self.cache is not None:
+                        self.cache.put(keys[i], rejected.to_cache())
+                    continue
+
+            with item_metrics.timer('decode'):
+                img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), self.read_flags)
+            if img is None:
+                results[i] = self.__with_metrics(PipelineResult(path, error='image could not be decoded'), item_metrics)
+                continue
+            pending.append((i, path, img))
+
+        processed = self.__process_batch([(path, img) for _, path, img in pending], [metrics[i] for i, _, _ in pending])
+        for (i, _, _), result in zip(pending, processed):
+            results[i] = result
+            if self.cache is not None:
+                self.cache.put(keys[i], result.to_cache())
+
+        return [result for result in results if result is not None]
+
+    def process_batch(
+        self,
+        items: Sequence[tuple[str, MatLike]],
+        metrics: Sequence[Metrics] | None = None,
+    ) -> list[PipelineResult]:
+        """
+        Обрабатывает несколько изображений (путь или имя, изображение): детекция
+        и сегментация идут по очереди, а символы всех номеров распознаются
+        одним вызовом recognize_batch
+        """
+        metrics = list(metrics) if metrics is not None else [self.new_metrics() for _ in items]
+        prescreen = self.prescreen
+        if prescreen is None:
+            return self.__process_batch(items, metrics)
+
+        results: list[PipelineResult | None] = []
+        pending: list[tuple[int, tuple[str, MatLike]]] = []
+        for i, ((path, img), item_metrics) in enumerate(zip(items, metrics)):
+            rejected = self.__prescreen(lambda: prescreen.reduce(img), path, item_metrics)
+            results.append(rejected)
+            if rejected is None:
+                pending.append((i, (path, img)))
+
+        processed = self.__process_batch([item for _, item in pending], [metrics[i] for i, _ in pending])
+        for (i, _), result in zip(pending, processed):
+            results[i] = result
+        return [result for result in results if result is not None]
+
+    def __process_batch(self, items: Sequence[tuple[str, MatLike]], metrics: list[Metrics]) -> list[PipelineResult]:
+        located: list[tuple[PipelineResult, _CandidateRead | None, Metrics]] = []
+        for slot, ((path, img), item_metrics) in enumerate(zip(items, metrics)):
+            located.append((*self.__locate(img, path, item_metrics, self.__scratch(slot)), item_metrics))
+
+        pending = [(result, read, metrics) for result, read, metrics in located if read is not None]
+        if pending:
+            recognizer = self.__recognizer([])
+            start = time.perf_counter()
+            readings = recognizer.read_batch([read.chars for _, read, _ in pending])
+            # Время общего распознавания делим поровну между номерами пачки
+            elapsed = (time.perf_counter() - start) / len(pending)
+            for (result, read, metrics), reading in zip(pending, readings):
+                read.reading = reading
+                if metrics.enabled:
+                    metrics.timings['recognize'] = elapsed
+                    metrics.count('batch_size', len(pending))
+                # Если лучший кандидат не прошёл проверку, следующие читаются уже по одному
+                self.__validate(result, read, metrics)
+
+        return [result for result, _, _ in located]
+
+    def __prescreen(
+        self,
+        load_small: Callable[[], MatLike | None],
+        path: str,
+        metrics: Metrics,
+    ) -> PipelineResult | None:
+        """
+        Результат-отказ, если на уменьшенной копии нет похожих на номер областей.
+        None — кадр нужно обработать полностью (в том числе если копию не удалось получить)
+        """
+        assert self.prescreen is not None
+        with metrics.timer('prescreen'):
+            small = load_small()
+            if small is None:
+                return None
+            screen = self.prescreen.screen(small)
+        metrics.count('prescreen_regions', screen.regions)
+        if screen.passed:
+            return None
+
+        metrics.count('prescreen_rejected')
+        return self.__with_metrics(PipelineResult(path, error='Нет похожих на номер областей'), metrics)
+
+    @staticmethod
+    def __with_metrics(result: PipelineResult, metrics: Metrics) -> PipelineResult:
+        if metrics.enabled:
+            # Словари общие с метриками: результат видит всё, что успели замерить этапы
+            result.timings, result.counters = metrics.timings, metrics.counters
+        return result
+
+    def __scratch(self, slot: int) -> ScratchBuffers | None:
+        if not self.reuse_buffers:
+            return None
+        slots: list[ScratchBuffers] | None = getattr(self.__local, 'slots', None)
+        if slots is None:
+            slots = self.__local.slots = []
+        while len(slots) <= slot:
+            slots.append(ScratchBuffers())
+        return slots[slot]
+
+    def __locate(
+        self,
+        img: MatLike,
+        path: str,
+        metrics: Metrics,
+        scratch: ScratchBuffers | None = None,
+        ahead: bool = False,
+        rois: Sequence[BoundingBox] | None = None,
+        preprocessed: tuple[MatLike, float, MatLike] | None = None,
+        debug: bool = False,
+    ) -> tuple[PipelineResult, '_CandidateRead | None']:
+        """
+        Детекция и сегментация лучшего кандидата: результат без текста
+        и прочтение кандидата (None, если номер не найден). Цветное изображение
+        сначала проходит через localizer (если он задан) и переводится в оттенки серого.
+        С ahead=True и пулом потоков кандидаты сегментируются и распознаются
+        в пуле наперёд (до max_reads), и прочтения приходят уже с текстом.
+        Заданные rois проверяются раньше областей от localizer.
+        С debug=True прочтения хранят копии своих промежуточных изображений
+        """
+        result = self.__with_metrics(PipelineResult(path), metrics)
+
+        rois = list(rois or [])
+        if img.ndim == 3:
+            if self.localizer is not None:
+                with metrics.timer('localize'):
+                    proposed = self.localizer.propose(img)
+                metrics.count('rois', len(proposed))
+                rois.extend(proposed)
+            img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+        detector = NumberDetector(
+            img, rois=rois, scratch=scratch, formats=self.formats, executor=self.executor, metrics=metrics,
+            preprocessed=preprocessed, **self.detector_params,
+        )
+        if ahead and self.executor is not None:
+            reads = detector.iter_evaluated(
+                partial(self.__crop, detector, metrics, False), partial(self.__evaluate, metrics), self.max_reads,
+            )
+        else:
+            reads = self.__iter_reads(detector, metrics, debug)
+
+        read = next(reads, None)
+        if read is None:
+            result.error = 'Не удалось распознать номер'
+        else:
+            read.following = reads
+        return result, read
+
+    def __iter_reads(
+        self,
+        detector: NumberDetector,
+        metrics: Metrics,
+        debug: bool = False,
+    ) -> Iterator['_CandidateRead']:
+        """
+        Вырезает и сегментирует кандидатов детектора по очереди
+        """
+        candidates = detector.iter_candidates()
+        while True:
+            with metrics.timer('detect'):
+                candidate = next(candidates, None)
+            if candidate is None:
+                return
+            if not debug:
+                yield self.__segment(metrics, self.__crop(detector, metrics, True, candidate))
+                continue
+
+            # Копии: буферы детектора и нормализатора перезаписываются следующими кандидатами
+            bbox, number_img = self.__crop(detector, metrics, False, candidate)
+            read_debug: dict[str, MatLike] = {'edges': detector.edges.copy(), 'number': number_img.copy()}
+            read_debug['contour'] = detector.img.copy()
+            cv2.drawContours(read_debug['contour'], [candidate.contour], -1, (0, 255, 0), 3)
+            chars = CharSegmenter(number_img, metrics, **self.segmenter_params).segment_characters(read_debug)
+            yield _CandidateRead(bbox, chars, debug=read_debug)
+
+    def __crop(
+        self,
+        detector: NumberDetector,
+        metrics: Metrics,
+        reuse: bool,
+        candidate: NumberCandidate,
+    ) -> tuple[BoundingBox, MatLike]:
+        """
+        Вырезка номера и его рамка в координатах исходного изображения. С reuse=False
+        вырезка не пишется в общий буфер нормализатора (кандидаты обрабатываются одновременно)
+        """
+        x, y, w, h = candidate.bbox
+        if self.normalizer is not None:
+            with metrics.timer('normalize'):
+                number_img = self.normalizer.normalize(detector, candidate, reuse)
+        else:
+            number_img = detector.crop_number(candidate)
+        # Детектор работает на увеличенном изображении, рамку отдаём в координатах исходного
+        s = detector.scale
+        return BoundingBox(int(x / s), int(y / s), int(w / s), int(h / s)), number_img
+
+    def __segment(self, metrics: Metrics, cropped: tuple[BoundingBox, MatLike]) -> '_CandidateRead':
+        bbox, number_img = cropped
+        chars = CharSegmenter(number_img, metrics, **self.segmenter_params).segment_characters()
+        return _CandidateRead(bbox, chars)
+
+    def __evaluate(self, metrics: Metrics, cropped: tuple[BoundingBox, MatLike]) -> '_CandidateRead':
+        """
+        Сегментация и распознавание кандидата в потоке пула. Распознаватель
+        здесь без пула: задача, которая ждёт свои же задачи в том же пуле,
+        может занять все потоки и не дождаться
+        """
+        read = self.__segment(metrics, cropped)
+        read.reading = self.__recognizer(read.chars, metrics, pooled=False).read()
+        return read
+
+    def __validate(self, result: PipelineResult, read: '_CandidateRead', metrics: Metrics) -> '_CandidateRead':
+        """
+        Записывает прочтение в результат. Если текст не похож на номер или
+        уверенность ниже min_confidence, читает следующих кандидатов (не больше
+        max_reads) и оставляет самое уверенное прочтение в формате номера;
+        если такого нет, остаётся прочтение лучшего по оценке кандидата.
+        Возвращает прочтение, попавшее в результат
+        """
+        result.apply(read)
+        following = read.following
+        best = read
+        tried = 1
+        while self.__doubtful(best) and tried < self.max_reads:
+            read = next(following, None)
+            if read is None:
+                break
+            tried += 1
+            if read.reading is None:
+                read.reading = self.__recognizer(read.chars, metrics).read()
+            if self.__better(read, best):
+                best = read
+                result.apply(read)
+        metrics.count('candidates_read', tried)
+        if self.__doubtful(best):
+            metrics.count('low_confidence')
+        return best
+
+    def __recognizer(self, chars: list[MatLike], metrics: Metrics | None = None, pooled: bool = True) -> CharRecognizer:
+        executor = self.executor if pooled else None
+        return CharRecognizer(chars, self.templates, self.letter_backend, metrics, self.formats, executor)
+
+    def __doubtful(self, read: '_CandidateRead') -> bool:
+        if not read.valid:
+            return True
+        return self.min_confidence is not None and read.confidence < self.min_confidence
+
+    @staticmethod
+    def __better(read: '_CandidateRead', best: '_CandidateRead') -> bool:
+        if not read.valid:
+            return False
+        return not best.valid or read.confidence > best.confidence
+
+
+@dataclass
+class _CandidateRead:
+    """
+    Прочтение одного кандидата и генератор, из которого берутся следующие
+    """
+    bbox: BoundingBox
+    chars: list[MatLike]
+    reading: PlateReading | None = None
+    # Следующие прочтения (у первого прочтения изображения); с пулом — уже с текстом
+    following: Iterator['_CandidateRead'] = field(default_factory=lambda: iter(()))
+    # Промежуточные изображения кандидата (только для Pipeline.process с debug)
+    debug: dict[str, MatLike] | None = None
+
+    @property
+    def number(self) -> str:
+        return self.reading.text if self.reading is not None else ''
+
+    @property
+    def confidence(self) -> float:
+        return self.reading.confidence if self.reading is not None else 0.0
+
+    @property
+    def valid(self) -> bool:
+        """
+        Текст соответствует одному из активных форматов
+        """
+        return self.reading is not None and self.reading.format is not None
@@ -0,0 +1,62 @@
+from dataclasses import asdict, dataclass, fields
+import json
+from typing import Any
+
+
+# Какие поля конфигурации относятся к какому этапу
+DETECTOR_FIELDS = (
+    'contrast_clip_limit',
+    'contrast_kernel_size',
+    'target_img_width',
+    'target_img_height',
+    'dilation_kernel_size',
+    'canny_threshold1',
+    'canny_threshold2',
+    'min_contour_area',
+)
+SEGMENTER_FIELDS = ('block_size', 'threshold_c')
+
+
+@dataclass(frozen=True)
+class PipelineConfig:
+    """
+    Настраиваемые пороги детектора и сегментатора. Значения по умолчанию
+    совпадают с прежними зашитыми в код
+    """
+    contrast_clip_limit: float = 3
+    contrast_kernel_size: int = 8
+    target_img_width: int = 1920
+    target_img_height: int = 1080
+    dilation_kernel_size: int = 3
+    canny_threshold1: float = 100
+    canny_threshold2: float = 200
+    min_contour_area: float = 1000
+    block_size: int = 13
+    threshold_c: float = 5
+
+    def detector_params(self) -> dict[str, Any]:
+        return {name: getattr(self, name) for name in DETECTOR_FIELDS}
+
+    def segmenter_params(self) -> dict[str, Any]:
+        return {name: getattr(self, name) for name in SEGMENTER_FIELDS}
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> 'PipelineConfig':
+        known = {f.name for f in fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f'unknown config keys: {", ".join(sorted(unknown))}')
+        return cls(**data)
+
+    @classmethod
+    def load(cls, path: str) -> 'PipelineConfig':
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    def save(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.write('\n')
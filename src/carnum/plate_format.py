@@ -0,0 +1,241 @@
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass, fields
+import json
+import os
+import re
+from typing import Any
+
+import numpy as np
+
+from src.carnum.instrumentation import logger
+
+
+# Буквы российских номеров, у которых есть латинские двойники
+PLATE_LETTERS = 'ABEKMHOPCTYX'
+PLATE_DIGITS = '0123456789'
+
+# Описания форматов, которые идут вместе с пакетом, и форматы по умолчанию
+FORMATS_FILE = os.path.join(os.path.dirname(__file__), 'plate_formats.json')
+# Примеры других форматов: их символов нет в банке шаблонов, загружаются только явно (path=...)
+EXAMPLE_FORMATS_FILE = os.path.join(os.path.dirname(__file__), 'plate_formats_examples.json')
+DEFAULT_FORMATS = ('ru',)
+
+# Классы позиций в раскладке: буква, цифра, цифра кода региона, любой символ
+LETTER, DIGIT, REGION, ANY = 'L', 'D', 'R', 'A'
+
+# Собранные форматы по (файл, имена): таблицы строятся один раз на процесс
+_loaded: dict[tuple[str, tuple[str, ...]], 'PlateFormats'] = {}
+
+
+@dataclass(frozen=True)
+class PlateProfile:
+    """
+    Описание одного формата номера: раскладки символов, алфавиты, правило
+    кода региона и ступени оценки пропорций пластины.
+
+    Раскладка — строка из классов позиций: L — буква, D — цифра, R — цифра
+    кода региона (только в конце), A — любой символ. Код региона, кроме
+    длины, проверяется регулярным выражением region
+    """
+    name: str
+    layouts: tuple[str, ...]
+    letters: str = PLATE_LETTERS
+    digits: str = PLATE_DIGITS
+    region: str = '[0-9]+'
+    # (мин, макс, баллы) по убыванию баллов: первая ступень — типичные пропорции формата
+    aspect_ratio: tuple[tuple[float, float, int], ...] = ((4.0, 5.0, 4), (3.5, 5.5, 2), (2.5, 6.0, 1))
+    # Вычитается из оценки раскладки при выборе формата: редкие форматы должны
+    # выигрывать заметно, а раскладки из A без штрафа выигрывали бы у строгих всегда
+    penalty: float = 0.0
+    description: str = ''
+    # Формат требует символов, которых нет в банке шаблонов: номера читаются лишь частично
+    experimental: bool = False
+
+    def __post_init__(self) -> None:
+        if not self.layouts:
+            raise ValueError(f'plate format {self.name!r} has no layouts')
+        for layout in self.layouts:
+            if not layout or set(layout) - {LETTER, DIGIT, REGION, ANY}:
+                raise ValueError(f'plate format {self.name!r}: bad layout {layout!r}')
+            if REGION in layout.rstrip(REGION):
+                raise ValueError(f'plate format {self.name!r}: region digits must end the layout {layout!r}')
+
+    @classmethod
+    def from_dict(cls, name: str, data: dict[str, Any]) -> 'PlateProfile':
+        known = {f.name for f in fields(cls)} - {'name'}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f'plate format {name!r}: unknown keys: {", ".join(sorted(unknown))}')
+        data = dict(data)
+        data['layouts'] = tuple(data['layouts'])
+        if 'aspect_ratio' in data:
+            data['aspect_ratio'] = tuple((float(lo), float(hi), int(points)) for lo, hi, points in data['aspect_ratio'])
+        return cls(name, **data)
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    def alphabet(self, position_class: str) -> str:
+        match position_class:
+            case 'L': return self.letters
+            case 'D' | 'R': return self.digits
+            case _: return self.letters + self.digits
+
+    def pattern(self) -> re.Pattern[str]:
+        """
+        Регулярное выражение для всех раскладок формата вместе с правилом кода региона
+        """
+        variants = []
+        for layout in self.layouts:
+            body = layout.rstrip(REGION)
+            parts = [f'[{re.escape(self.alphabet(c))}]' for c in body]
+            region_length = len(layout) - len(body)
+            if region_length:
+                # Опережающая проверка: оставшаяся часть текста — код региона по правилу формата
+                parts.append(f'(?=(?:{self.region})$)[{re.escape(self.digits)}]{{{region_length}}}')
+            variants.append(''.join(parts))
+        return re.compile('|'.join(f'(?:{variant})' for variant in variants))
+
+
+class PlateFormats:
+    """
+    Активные форматы номеров, собранные в таблицы.
+
+    Каждая раскладка каждого формата — строка таблиц: длина, штраф, маска
+    допустимых символов банка шаблонов по позициям. Ступени пропорций
+    хранятся массивами (формат x ступень). Поэтому кандидаты детектора и
+    прочтения символов сравниваются со всеми форматами одним проходом NumPy,
+    без повторного запуска цепочки для каждого формата
+    """
+    def __init__(self, profiles: Sequence[PlateProfile]) -> None:
+        if not profiles:
+            raise ValueError('at least one plate format is required')
+        self.profiles: list[PlateProfile] = list(profiles)
+        self.names: list[str] = [profile.name for profile in self.profiles]
+
+        rows = [(i, layout) for i, profile in enumerate(self.profiles) for layout in profile.layouts]
+        self.layouts: list[str] = [layout for _, layout in rows]
+        self.layout_profiles: np.ndarray = np.array([i for i, _ in rows], dtype=np.intp)
+        self.layout_lengths: np.ndarray = np.array([len(layout) for layout in self.layouts], dtype=np.intp)
+        self.layout_penalties: np.ndarray = np.array([self.profiles[i].penalty for i, _ in rows])
+        self.max_length: int = int(self.layout_lengths.max())
+        # Самый короткий номер задаёт предел ширины одного символа для сегментатора
+        self.max_char_width: float = 1 / int(self.layout_lengths.min())
+
+        # Недостающие ступени — пустые интервалы без баллов
+        tiers = max(len(profile.aspect_ratio) for profile in self.profiles)
+        self.aspect_bounds: np.ndarray = np.tile([np.inf, -np.inf], (len(self.profiles), tiers, 1))
+        self.aspect_points: np.ndarray = np.zeros((len(self.profiles), tiers), dtype=np.int64)
+        for i, profile in enumerate(self.profiles):
+            for j, (lo, hi, points) in enumerate(profile.aspect_ratio):
+                self.aspect_bounds[i, j] = lo, hi
+                self.aspect_points[i, j] = points
+
+        self.patterns: list[re.Pattern[str]] = [profile.pattern() for profile in self.profiles]
+        # Позиции, где букву ждёт хотя бы одна раскладка: их можно распознавать, не дожидаясь выбора раскладки
+        self.letter_positions: np.ndarray = np.array([
+            [self.position_class(r, i) == LETTER for i in range(self.max_length)] for r in range(len(self.layouts))
+        ]).any(axis=0)
+        self.__masks: dict[tuple[str, ...], np.ndarray] = {}
+
+    def fingerprint(self) -> list[dict[str, Any]]:
+        return [profile.to_dict() for profile in self.profiles]
+
+    def match(self, text: str | None) -> str | None:
+        """
+        Имя первого формата, которому соответствует текст
+        """
+        if not text:
+            return None
+        for name, pattern in zip(self.names, self.patterns):
+            if pattern.fullmatch(text) is not None:
+                return name
+        return None
+
+    def is_valid(self, text: str | None) -> bool:
+        return self.match(text) is not None
+
+    def aspect_score(self, aspect_ratio: np.ndarray) -> np.ndarray:
+        """
+        Баллы за пропорции: лучшая ступень лучшего формата для каждого кандидата
+        """
+        ratios = aspect_ratio[:, None, None]
+        inside = (ratios >= self.aspect_bounds[..., 0]) & (ratios <= self.aspect_bounds[..., 1])
+        return np.where(inside, self.aspect_points, 0).max(axis=(1, 2))
+
+    def position_class(self, layout: int, position: int) -> str:
+        """
+        Класс позиции раскладки; позиции за её концом берут класс последней
+        """
+        chars = self.layouts[layout]
+        return chars[min(position, len(chars) - 1)]
+
+    def may_be_letter(self, position: int) -> bool:
+        return bool(self.letter_positions[min(position, self.max_length - 1)])
+
+    def masks(self, chars: Sequence[str]) -> np.ndarray:
+        """
+        Допустимые символы банка шаблонов: (раскладка x позиция x символ) на max_length позиций.
+        Таблица строится один раз для набора символов банка
+        """
+        key = tuple(chars)
+        table = self.__masks.get(key)
+        if table is None:
+            table = np.zeros((len(self.layouts), self.max_length, len(chars)), dtype=bool)
+            for r, profile_index in enumerate(self.layout_profiles):
+                profile = self.profiles[profile_index]
+                for i in range(self.max_length):
+                    alphabet = profile.alphabet(self.position_class(r, i))
+                    table[r, i] = [char in alphabet for char in chars]
+            self.__masks[key] = table
+        return table
+
+    def select_layout(self, scores: np.ndarray, chars: Sequence[str]) -> tuple[int, np.ndarray]:
+        """
+        Раскладка для символов одного номера по матрице оценок (символ x шаблон):
+        в каждой позиции берётся лучший допустимый символ, оценка раскладки —
+        средняя по позициям (по самому слабому символу выбор решал бы шум одной
+        позиции). Выигрывают раскладки нужной длины, среди них — с лучшей оценкой
+        за вычетом штрафа формата, при равенстве — первая.
+        Возвращает индекс раскладки и её маску (позиция x символ)
+        """
+        positions = np.minimum(np.arange(len(scores)), self.max_length - 1)
+        masks = self.masks(chars)[:, positions]
+        best = np.where(masks, scores, -np.inf).max(axis=2, initial=-np.inf)
+        # Позиция без допустимых символов в банке читается как неизвестный символ с оценкой 0
+        best = np.where(np.isfinite(best), best, 0.0)
+        score = best.mean(axis=1) - self.layout_penalties if len(scores) else -self.layout_penalties
+        fits = self.layout_lengths == len(scores)
+        layout = int(np.lexsort((-score, ~fits))[0])
+        return layout, masks[layout]
+
+
+def read_profiles(path: str = FORMATS_FILE) -> dict[str, PlateProfile]:
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    return {name: PlateProfile.from_dict(name, value) for name, value in data.items()}
+
+
+def load_plate_formats(names: Sequence[str] = DEFAULT_FORMATS, path: str = FORMATS_FILE) -> PlateFormats:
+    """
+    Форматы с заданными именами из JSON, собранные один раз на процесс
+    """
+    key = (path, tuple(names))
+    formats = _loaded.get(key)
+    if formats is None:
+        profiles = read_profiles(path)
+        unknown = [name for name in names if name not in profiles]
+        if unknown:
+            raise ValueError(f'unknown plate formats: {", ".join(unknown)} (available: {", ".join(profiles)})')
+        experimental = [name for name in names if profiles[name].experimental]
+        if experimental:
+            logger.warning('Экспериментальные форматы номеров (не все буквы есть в шаблонах): %s', ', '.join(experimental))
+        formats = _loaded[key] = PlateFormats([profiles[name] for name in names])
+    return formats
+
+
+def is_valid_plate(text: str | None, formats: PlateFormats | None = None) -> bool:
+    """
+    Соответствует ли прочитанный текст одному из форматов (по умолчанию — российскому номеру)
+    """
+    return (formats or load_plate_formats()).is_valid(text)
@@ -0,0 +1,73 @@
+import cv2
+from cv2.typing import MatLike
+import numpy as np
+
+from src.carnum.number_candidate import NumberCandidate
+from src.carnum.number_detector import NumberDetector
+
+
+# Размер российского номера в миллиметрах: 520x112
+PLATE_SIZE = (520, 112)
+
+
+class PlateNormalizer:
+    """
+    Выравнивание наклонённого номера перед сегментацией.
+
+    Углы берутся из повёрнутого прямоугольника, описанного вокруг
+    аппроксимированного контура кандидата. По умолчанию (size=None) номер
+    сохраняет свой размер и поворачивается, только если наклон не меньше
+    min_skew градусов: пороги CharSegmenter подобраны под такие вырезки.
+    С size=(w, h), например PLATE_SIZE, номер всегда приводится к каноническому
+    размеру — это вход для внешнего OCR, а не для CharSegmenter: на размеченных
+    изображениях так не читается ни один номер. Своих буферов у нормализатора нет,
+    поэтому один объект можно вызывать из нескольких потоков
+    """
+    def __init__(self, size: tuple[int, int] | None = None, min_skew: float = 3.0) -> None:
+        self.size: tuple[int, int] | None = size
+        self.min_skew: float = min_skew
+
+    @staticmethod
+    def corners(contour: MatLike) -> np.ndarray:
+        """
+        Углы повёрнутого прямоугольника контура: левый верхний, правый верхний, правый нижний, левый нижний
+        """
+        points = cv2.boxPoints(cv2.minAreaRect(contour.reshape(-1, 2).astype(np.float32)))
+        sums = points.sum(axis=1)
+        diffs = np.diff(points, axis=1).ravel()
+        return np.array([
+            points[np.argmin(sums)],
+            points[np.argmin(diffs)],
+            points[np.argmax(sums)],
+            points[np.argmax(diffs)],
+        ], dtype=np.float32)
+
+    def normalize(self, detector: NumberDetector, candidate: NumberCandidate, reuse: bool = True) -> MatLike:
+        """
+        Выровненная вырезка номера из обработанного изображения детектора.
+        Вырезка канонического размера пишется в буфер из detector.scratch (у каждого
+        потока свои буферы); сегментатор пишет бинаризацию в новый массив и на буфер
+        не ссылается. С reuse=False результат пишется в новый массив: так вырезки
+        нескольких кандидатов одного изображения могут обрабатываться одновременно
+        """
+        scale = detector.crop_scale
+        corners = self.corners(candidate.contour)
+        top_left, top_right, bottom_right, bottom_left = corners
+
+        if self.size is not None:
+            width, height = self.size
+            out = detector.scratch.get('normalized', (height, width)) if reuse and detector.scratch is not None else None
+        else:
+            skew = np.degrees(np.arctan2(top_right[1] - top_left[1], top_right[0] - top_left[0]))
+            width = int(round((np.linalg.norm(top_right - top_left) + np.linalg.norm(bottom_right - bottom_left)) / 2 * scale))
+            height = int(round((np.linalg.norm(bottom_left - top_left) + np.linalg.norm(bottom_right - top_right)) / 2 * scale))
+            if abs(skew) < self.min_skew or width <= 0 or height <= 0:
+                return detector.crop_number(candidate)
+            out = None
+
+        target = np.array([[0, 0], [width - 1, 0], [width - 1, height - 1], [0, height - 1]], dtype=np.float32)
+        matrix = cv2.getPerspectiveTransform(corners, target)
+        return cv2.warpPerspective(
+            detector.img, matrix, (width, height), dst=out, flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE,
+        )
+
@@ -0,0 +1,64 @@
+from dataclasses import dataclass, field
+from typing import Any
+
+
+@dataclass(slots=True)
+class CharReading:
+    """
+    Прочтение одного символа: выбранный символ, его оценка и k лучших
+    вариантов по убыванию оценки (первый совпадает с выбранным).
+    Для шаблонов оценка — коэффициент корреляции (-1..1), для Tesseract — доверие 0..1
+    """
+    char: str
+    score: float
+    alternatives: list[tuple[str, float]] = field(default_factory=list)
+
+    @property
+    def margin(self) -> float:
+        """
+        Отрыв от второго варианта: малый отрыв — символ легко спутать
+        """
+        if len(self.alternatives) < 2:
+            return self.score
+        return self.score - self.alternatives[1][1]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'char': self.char,
+            'score': round(self.score, 4),
+            # Производное поле для потребителей JSON, from_dict его не читает
+            'margin': round(self.margin, 4),
+            'alternatives': [[char, round(score, 4)] for char, score in self.alternatives],
+        }
+
+    @classmethod
+    def from_dict(cls, value: dict[str, Any]) -> 'CharReading':
+        return cls(value['char'], value['score'], [(char, score) for char, score in value['alternatives']])
+
+
+@dataclass(slots=True)
+class PlateReading:
+    """
+    Прочтение номера по символам. Уверенность номера — оценка самого
+    слабого символа: одной ошибки достаточно, чтобы номер был прочитан неверно
+    """
+    chars: list[CharReading] = field(default_factory=list)
+    # Формат, которому соответствует текст (None — ни одному из активных)
+    format: str | None = None
+
+    @property
+    def text(self) -> str:
+        return ''.join(reading.char for reading in self.chars)
+
+    @property
+    def confidence(self) -> float:
+        return min((reading.score for reading in self.chars), default=0.0)
+
+    @property
+    def weakest(self) -> int | None:
+        """
+        Позиция символа с наименьшей оценкой
+        """
+        if not self.chars:
+            return None
+        return min(range(len(self.chars)), key=lambda i: self.chars[i].score)
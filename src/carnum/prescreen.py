@@ -0,0 +1,85 @@
+from dataclasses import dataclass
+from typing import Literal
+
+import cv2
+from cv2.typing import MatLike
+import numpy as np
+
+Reduction = Literal[2, 4, 8]
+
+# JPEG декодируется сразу в уменьшенном виде: библиотека пропускает часть обратного DCT
+REDUCED_FLAGS: dict[int, int] = {
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+# Пределы для области, похожей на номер (доли уменьшенного кадра)
+ASPECT_MIN = 2.0
+ASPECT_MAX = 8.0
+MIN_HEIGHT = 3
+MAX_HEIGHT = 0.25
+MIN_WIDTH = 0.025
+MAX_WIDTH = 0.5
+MIN_FILL = 0.5
+
+
+@dataclass
+class ScreenResult:
+    regions: int
+    passed: bool
+
+
+class PlatePrescreen:
+    """
+    Дешёвая предварительная проверка: есть ли на кадре что-то похожее на номер.
+
+    На копии, уменьшенной в reduction раз, вертикальные границы Собеля
+    (штрихи символов) бинаризуются по Отсу и сливаются горизонтальным
+    замыканием. Связные области с пропорциями номера считаются кандидатами;
+    если их меньше min_regions, полная обработка кадра пропускается
+    """
+    def __init__(self, reduction: Reduction = 4, min_regions: int = 1) -> None:
+        if reduction not in REDUCED_FLAGS:
+            raise ValueError(f'reduction must be one of {sorted(REDUCED_FLAGS)}, got {reduction}')
+        self.reduction: Reduction = reduction
+        self.min_regions: int = min_regions
+
+    @property
+    def read_flags(self) -> int:
+        return REDUCED_FLAGS[self.reduction]
+
+    def decode(self, data: bytes | memoryview) -> MatLike | None:
+        return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), self.read_flags)
+
+    def read(self, path: str) -> MatLike | None:
+        return cv2.imread(path, self.read_flags)
+
+    def reduce(self, img: MatLike) -> MatLike:
+        """
+        Уменьшенная копия уже декодированного изображения (кадры видео, цветные изображения)
+        """
+        if img.ndim == 3:
+            img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        scale = 1 / self.reduction
+        return cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    def screen(self, small: MatLike) -> ScreenResult:
+        gradient = cv2.convertScaleAbs(cv2.Sobel(small, cv2.CV_16S, 1, 0, ksize=3))
+        _, strong = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        merged = cv2.morphologyEx(strong, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (9, 3)))
+        merged = cv2.morphologyEx(merged, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (5, 3)))
+
+        _, _, stats, _ = cv2.connectedComponentsWithStats(merged)
+        # Первая компонента — фон
+        _, _, w, h, area = stats[1:].T
+        height, width = small.shape[:2]
+        aspect_ratio = w / np.maximum(h, 1)
+        plate_like = (
+            (aspect_ratio >= ASPECT_MIN) & (aspect_ratio <= ASPECT_MAX)
+            & (h >= MIN_HEIGHT) & (h <= MAX_HEIGHT * height)
+            & (w >= MIN_WIDTH * width) & (w <= MAX_WIDTH * width)
+            & (area >= MIN_FILL * w * h)
+        )
+        regions = int(np.count_nonzero(plate_like))
+        return ScreenResult(regions, regions >= self.min_regions)
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any
+
+
+# Как часто (в записях) проверять размер кэша и вытеснять давно не использованные
+EVICT_EVERY = 64
+# Сколько попаданий копить, прежде чем записать время последнего обращения одной транзакцией
+TOUCH_EVERY = 64
+
+
+def cache_key(data: bytes | memoryview, fingerprint: str) -> str:
+    """
+    Ключ кэша: хэш байтов изображения и настроек конвейера
+    """
+    digest = hashlib.sha256(data)
+    digest.update(fingerprint.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Результаты распознавания в SQLite по хэшу содержимого.
+
+    Размер ограничен max_entries записями: при переполнении удаляются записи,
+    к которым дольше всего не обращались (LRU). Время обращения при попадании
+    не пишется сразу, а копится и записывается пачкой (каждые TOUCH_EVERY
+    попаданий, перед вытеснением и при закрытии): иначе каждое попадание
+    стоило бы транзакции на запись. Если процесс завершится без close(),
+    пропадут не больше TOUCH_EVERY отметок, и вытеснение лишь чуть менее
+    точно. Файл можно открывать из нескольких процессов одновременно, а один
+    объект — использовать из нескольких потоков (соединение одно, обращения
+    к нему идут под блокировкой)
+    """
+    def __init__(self, path: str, max_entries: int = 100_000) -> None:
+        self.path: str = path
+        self.max_entries: int = max_entries
+        self.hits: int = 0
+        self.misses: int = 0
+        self.writes: int = 0
+        # Ключ -> время последнего попадания, ещё не записанное в базу
+        self.__touched: dict[str, float] = {}
+        self.lock: threading.Lock = threading.Lock()
+
+        self.connection: sqlite3.Connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, last_used REAL NOT NULL)'
+        )
+        self.connection.execute('CREATE INDEX IF NOT EXISTS results_last_used ON results(last_used)')
+        self.connection.commit()
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        with self.lock:
+            row = self.connection.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.__touched[key] = time.time()
+            if len(self.__touched) >= TOUCH_EVERY:
+                self.__flush_touched()
+        return json.loads(row[0])
+
+    def put(self, key: str, value: dict[str, Any]) -> None:
+        data = json.dumps(value, ensure_ascii=False)
+        with self.lock:
+            with self.connection:
+                self.connection.execute(
+                    'INSERT OR REPLACE INTO results (key, value, last_used) VALUES (?, ?, ?)',
+                    (key, data, time.time()),
+                )
+            self.__touched.pop(key, None)
+            self.writes += 1
+            if self.writes % EVICT_EVERY == 0:
+                self.__evict()
+
+    def flush(self) -> None:
+        """
+        Записывает накопленное время обращений
+        """
+        with self.lock:
+            self.__flush_touched()
+
+    def __flush_touched(self) -> None:
+        if not self.__touched:
+            return
+        with self.connection:
+            self.connection.executemany(
+                'UPDATE results SET last_used = ? WHERE key = ?',
+                [(used, key) for key, used in self.__touched.items()],
+            )
+        self.__touched.clear()
+
+    def evict(self) -> int:
+        """
+        Удаляет самые давно использованные записи сверх max_entries
+        """
+        with self.lock:
+            return self.__evict()
+
+    def __evict(self) -> int:
+        # Вытеснение должно видеть и попадания, которые ещё не записаны
+        self.__flush_touched()
+        with self.connection:
+            (count,) = self.connection.execute('SELECT COUNT(*) FROM results').fetchone()
+            excess = count - self.max_entries
+            if excess <= 0:
+                return 0
+            self.connection.execute(
+                'DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_used LIMIT ?)',
+                (excess,),
+            )
+        return excess
+
+    def stats(self) -> dict[str, int]:
+        with self.lock:
+            (entries,) = self.connection.execute('SELECT COUNT(*) FROM results').fetchone()
+            return {'entries': entries, 'hits': self.hits, 'misses': self.misses}
+
+    def close(self) -> None:
+        with self.lock:
+            self.__flush_touched()
+            self.connection.close()
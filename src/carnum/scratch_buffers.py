@@ -0,0 +1,24 @@
+import numpy as np
+
+
+class ScratchBuffers:
+    """
+    Переиспользуемые промежуточные массивы этапов детектора.
+
+    Этапы OpenCV пишут результат в dst-буфер нужного размера вместо нового
+    массива на каждое изображение. Буфер пересоздаётся, только если размер
+    кадра изменился. Содержимое действительно до обработки следующего
+    изображения с этими же буферами, поэтому один набор нельзя делить между
+    потоками или изображениями, которые обрабатываются одновременно
+    """
+    def __init__(self) -> None:
+        self.buffers: dict[str, np.ndarray] = {}
+
+    def get(self, name: str, shape: tuple[int, ...], dtype: np.dtype | type = np.uint8) -> np.ndarray:
+        buffer = self.buffers.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = self.buffers[name] = np.empty(shape, dtype=dtype)
+        return buffer
+
+    def nbytes(self) -> int:
+        return sum(buffer.nbytes for buffer in self.buffers.values())
@@ -0,0 +1,316 @@
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+import cv2
+
+from src.carnum.pipeline import Pipeline
+from src.carnum.pipeline import PipelineResult
+from src.carnum.template_bank import get_template_bank
+from src.carnum.instrumentation import MetricsAggregator, configure_logging, logger
+
+
+# Пайплайн рабочего процесса: создаётся один раз в initializer и живёт до остановки сервиса
+_worker_pipeline: Pipeline | None = None
+
+# Окно, по которому считается текущая пропускная способность, секунды
+THROUGHPUT_WINDOW = 60.0
+
+
+def _init_worker(pipeline_params: dict[str, Any], log_level: int | str) -> None:
+    global _worker_pipeline
+    configure_logging(log_level)
+    cv2.setNumThreads(1)
+    _worker_pipeline = Pipeline(**pipeline_params)
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+def _recognize_in_worker(requests: list[tuple[str, bytes]]) -> list[PipelineResult]:
+    """
+    Обрабатывает пачку закодированных изображений одним Pipeline.process_encoded_batch
+    """
+    assert _worker_pipeline is not None, 'worker is not initialized'
+    try:
+        return _worker_pipeline.process_encoded_batch(requests)
+    except Exception as e:
+        return [PipelineResult(name, error=str(e)) for name, _ in requests]
+
+
+@dataclass
+class _Request:
+    name: str
+    data: bytes
+    future: Future = field(default_factory=Future)
+    received: float = field(default_factory=time.perf_counter)
+
+
+class RecognitionService:
+    """
+    Распознавание в тёплых рабочих процессах с объединением запросов в пачки.
+
+    Запросы копятся не дольше max_wait секунд (или до max_batch штук) и уходят
+    в рабочий процесс одной задачей: символы всех номеров пачки сравниваются
+    с шаблонами одним умножением матриц.
+
+    Если рабочий процесс погиб (например, его убил OOM killer), пул процессов
+    ломается: пачки в работе завершаются с ошибкой, /health сообщает о сбое,
+    а перед следующей пачкой пул создаётся заново
+    """
+    def __init__(
+        self,
+        workers: int | None = None,
+        max_batch: int = 8,
+        max_wait: float = 0.005,
+        log_level: int | str = logging.WARNING,
+        **pipeline_params: Any,
+    ) -> None:
+        self.workers: int = workers or os.cpu_count() or 1
+        self.max_batch: int = max(1, max_batch)
+        self.max_wait: float = max_wait
+        self.log_level: int | str = log_level
+        self.pipeline_params: dict[str, Any] = pipeline_params
+
+        self.requests: queue.Queue[_Request | None] = queue.Queue()
+        self.executor: ProcessPoolExecutor | None = None
+        self.batcher: threading.Thread | None = None
+        self.aggregator: MetricsAggregator = MetricsAggregator()
+
+        self.lock: threading.Lock = threading.Lock()
+        self.started: float = 0.0
+        self.in_flight: int = 0
+        self.received: int = 0
+        self.completed: int = 0
+        self.errors: int = 0
+        self.batches: int = 0
+        self.recent: deque[float] = deque()
+        # Почему сломался пул процессов (None — пул исправен) и сколько раз его пересоздавали
+        self.pool_error: str | None = None
+        self.pool_restarts: int = 0
+
+    def start(self) -> None:
+        get_template_bank(self.pipeline_params.get('templates_dir', 'img/templates'))
+
+        self.executor = self.__new_pool()
+        self.started = time.monotonic()
+        self.batcher = threading.Thread(target=self.__batch_loop, name='carnum-batcher', daemon=True)
+        self.batcher.start()
+
+    def stop(self) -> None:
+        if self.batcher is not None:
+            self.requests.put(None)
+            self.batcher.join()
+            self.batcher = None
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def submit(self, data: bytes, name: str = '') -> Future:
+        """
+        Ставит изображение в очередь, Future вернёт PipelineResult
+        """
+        request = _Request(name, data)
+        with self.lock:
+            self.received += 1
+        self.requests.put(request)
+        return request.future
+
+    def recognize(self, data: bytes, name: str = '', timeout: float | None = None) -> PipelineResult:
+        return self.submit(data, name).result(timeout)
+
+    def __batch_loop(self) -> None:
+        while (first := self.requests.get()) is not None:
+            batch = [first]
+            deadline = time.perf_counter() + self.max_wait
+            stop = False
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                try:
+                    # После дедлайна забираем только то, что уже лежит в очереди
+                    request = self.requests.get(timeout=timeout) if timeout > 0 else self.requests.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    stop = True
+                    break
+                batch.append(request)
+
+            self.__dispatch(batch)
+            if stop:
+                break
+
+    def __new_pool(self) -> ProcessPoolExecutor:
+        executor = ProcessPoolExecutor(
+            self.workers, initializer=_init_worker, initargs=(self.pipeline_params, self.log_level),
+        )
+        try:
+            # Поднимаем все процессы сразу, чтобы первый запрос не платил за импорт и шаблоны
+            for future in [executor.submit(_warm_up) for _ in range(self.workers)]:
+                future.result()
+        except BaseException:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        return executor
+
+    def __restart_pool(self) -> None:
+        """
+        Заменяет сломанный пул новым (в потоке пачек, пока новые пачки не отправляются)
+        """
+        broken, self.executor = self.executor, None
+        if broken is not None:
+            broken.shutdown(wait=False, cancel_futures=True)
+        logger.warning('Пересоздаём пул процессов: %s', self.pool_error)
+        self.executor = self.__new_pool()
+        with self.lock:
+            self.pool_error = None
+            self.pool_restarts += 1
+
+    def __dispatch(self, batch: list[_Request]) -> None:
+        with self.lock:
+            self.in_flight += len(batch)
+            self.batches += 1
+
+        try:
+            if self.pool_error is not None:
+                self.__restart_pool()
+            assert self.executor is not None, 'service is not started'
+            future = self.executor.submit(_recognize_in_worker, [(r.name, r.data) for r in batch])
+        except Exception as e:
+            # Пачка не попала в пул (сломан или не пересоздался): завершаем её ошибкой сразу,
+            # иначе клиенты ждут до таймаута, а пул пробуем пересоздать перед следующей пачкой
+            logger.error('Пачку не удалось отправить в пул процессов: %s', e)
+            with self.lock:
+                self.pool_error = str(e) or type(e).__name__
+            future = Future()
+            future.set_exception(e)
+        future.add_done_callback(lambda f: self.__complete(batch, f))
+
+    def __complete(self, batch: list[_Request], future: Future) -> None:
+        try:
+            results = future.result()
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool) and self.pool_error is None:
+                # Рабочий процесс погиб посреди пачки: все пачки этого пула завершатся так же
+                logger.error('Пул процессов сломан: %s', e)
+                with self.lock:
+                    self.pool_error = str(e) or type(e).__name__
+            results = [PipelineResult(r.name, error=str(e) or type(e).__name__) for r in batch]
+
+        now = time.monotonic()
+        with self.lock:
+            self.in_flight -= len(batch)
+            for request, result in zip(batch, results):
+                result.timings['service'] = time.perf_counter() - request.received
+                self.completed += 1
+                self.errors += result.error is not None
+                self.recent.append(now)
+                self.aggregator.add(result.timings, result.counters)
+            while self.recent and now - self.recent[0] > THROUGHPUT_WINDOW:
+                self.recent.popleft()
+
+        for request, result in zip(batch, results):
+            request.future.set_result(result)
+
+    def health(self) -> dict[str, Any]:
+        with self.lock:
+            now = time.monotonic()
+            window = min(THROUGHPUT_WINDOW, now - self.started) or 1.0
+            if self.pool_error is not None:
+                status = 'unhealthy'
+            else:
+                status = 'ok' if self.executor is not None else 'stopped'
+            return {
+                'status': status,
+                'pool_error': self.pool_error,
+                'pool_restarts': self.pool_restarts,
+                'workers': self.workers,
+                'queue_depth': self.requests.qsize(),
+                'in_flight': self.in_flight,
+                'received': self.received,
+                'completed': self.completed,
+                'errors': self.errors,
+                'batches': self.batches,
+                'mean_batch_size': self.completed / self.batches if self.batches else 0.0,
+                'throughput': sum(1 for t in self.recent if now - t <= THROUGHPUT_WINDOW) / window,
+                'uptime': now - self.started,
+            }
+
+    def metrics(self) -> dict[str, Any]:
+        health = self.health()
+        with self.lock:
+            health['stages'] = self.aggregator.summary()
+        return health
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: 'RecognitionServer'
+
+    def do_GET(self) -> None:
+        match urlsplit(self.path).path:
+            case '/health':
+                health = self.server.service.health()
+                # Балансировщик по коду ответа уводит запросы от неисправного сервиса
+                status = HTTPStatus.OK if health['status'] == 'ok' else HTTPStatus.SERVICE_UNAVAILABLE
+                self.__reply(status, health)
+            case '/metrics':
+                self.__reply(HTTPStatus.OK, self.server.service.metrics())
+            case _:
+                self.__reply(HTTPStatus.NOT_FOUND, {'error': 'not found'})
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        if url.path != '/recognize':
+            self.__reply(HTTPStatus.NOT_FOUND, {'error': 'not found'})
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0:
+            self.__reply(HTTPStatus.BAD_REQUEST, {'error': 'empty body'})
+            return
+
+        name = parse_qs(url.query).get('name', [''])[0]
+        try:
+            result = self.server.service.recognize(self.rfile.read(length), name, self.server.timeout_s)
+        except TimeoutError:
+            self.__reply(HTTPStatus.GATEWAY_TIMEOUT, {'error': 'recognition timed out'})
+            return
+        self.__reply(HTTPStatus.OK, result.to_dict())
+
+    def __reply(self, status: HTTPStatus, body: dict[str, Any]) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug('%s %s', self.address_string(), format % args)
+
+
+class RecognitionServer(ThreadingHTTPServer):
+    """
+    Локальный HTTP-интерфейс сервиса:
+        POST /recognize[?name=...] — тело запроса с байтами изображения, ответ — PipelineResult в JSON
+        GET /health — состояние пула процессов (503, если он сломан), очередь, задачи в работе, пропускная способность
+        GET /metrics — то же плюс гистограммы времени этапов
+    """
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], service: RecognitionService, timeout_s: float = 30.0) -> None:
+        super().__init__(address, _Handler)
+        self.service: RecognitionService = service
+        self.timeout_s: float = timeout_s
@@ -0,0 +1,138 @@
+from collections.abc import Sequence
+import os
+import tempfile
+import zipfile
+
+import cv2
+from cv2.typing import MatLike
+import numpy as np
+
+from src.carnum.template_generator import generate_digit_template, generate_letter_template
+from src.carnum.template_matcher import TemplateMatcher
+
+
+DIGITS = '0123456789'
+LETTERS = 'ABEKMHOPCTYX'
+CACHE_FILE = 'templates.npz'
+
+# Загруженные банки по каталогу: (отпечаток исходников, банк). Рабочие процессы,
+# созданные через fork после загрузки, получают банк без повторного чтения
+_banks: dict[str, tuple[str, 'TemplateBank']] = {}
+
+
+class TemplateBank:
+    """
+    Банк шаблонов символов с заранее подготовленными матрицами для сравнения
+    """
+    def __init__(self, templates: dict[str, MatLike]) -> None:
+        self.templates: dict[str, MatLike] = templates
+        self.digits: TemplateMatcher = TemplateMatcher({c: t for c, t in templates.items() if c in DIGITS})
+        self.letters: TemplateMatcher = TemplateMatcher({c: t for c, t in templates.items() if c in LETTERS})
+        # Общая матрица цифр и букв: раскладку номера выбирают по оценкам всех символов сразу
+        self.chars: list[str] = self.digits.chars + self.letters.chars
+        self.matrix: np.ndarray = np.vstack((self.digits.matrix, self.letters.matrix))
+
+    def scores(self, symbols: Sequence[MatLike]) -> np.ndarray:
+        """
+        Матрица оценок (символ x шаблон) по всем шаблонам банка в порядке self.chars
+        """
+        return self.digits.vectorize(symbols) @ self.matrix.T
+
+    @classmethod
+    def from_directory(cls, directory: str) -> 'TemplateBank':
+        """
+        Читает PNG-шаблоны; если их нет, рисует шаблоны в памяти
+        """
+        templates: dict[str, MatLike] = {}
+        for c in DIGITS + LETTERS:
+            path = f'{directory}/{c}.png'
+            img = cv2.imread(path, cv2.IMREAD_GRAYSCALE) if os.path.exists(path) else None
+            if img is not None:
+                templates[c] = img
+
+        if not templates:
+            templates = cls.synthesize()
+
+        return cls(templates)
+
+    @staticmethod
+    def synthesize() -> dict[str, MatLike]:
+        templates: dict[str, MatLike] = {d: generate_digit_template(d) for d in DIGITS}
+        templates.update({letter: generate_letter_template(letter) for letter in LETTERS})
+        return templates
+
+    def save(self, path: str, fingerprint: str = '') -> None:
+        """
+        Пишет банк во временный файл рядом и подменяет им path: рабочие процессы,
+        которые одновременно читают path, видят либо старый файл, либо новый целиком
+        """
+        fd, tmp_path = tempfile.mkstemp(suffix='.npz', prefix='.templates-', dir=os.path.dirname(path) or '.')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(
+                    f,
+                    chars=np.array(list(self.templates)),
+                    templates=np.stack(list(self.templates.values())),
+                    fingerprint=np.array(fingerprint),
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> tuple['TemplateBank', str]:
+        """
+        Загружает банк из .npz, возвращает его вместе с отпечатком исходников
+        """
+        with np.load(path) as data:
+            templates = dict(zip((str(c) for c in data['chars']), data['templates']))
+            return cls(templates), str(data['fingerprint'])
+
+
+def source_fingerprint(directory: str) -> str:
+    """
+    Отпечаток PNG-шаблонов по времени изменения и размеру файлов
+    """
+    parts: list[str] = []
+    for c in DIGITS + LETTERS:
+        try:
+            stat = os.stat(f'{directory}/{c}.png')
+        except OSError:
+            continue
+        parts.append(f'{c}:{stat.st_mtime_ns}:{stat.st_size}')
+    return ';'.join(parts)
+
+
+def get_template_bank(directory: str = 'img/templates') -> TemplateBank:
+    """
+    Банк шаблонов из каталога, загруженный один раз на процесс.
+
+    Банк сохраняется в directory/templates.npz и перечитывается из PNG,
+    только если исходные файлы изменились.
+    """
+    fingerprint = source_fingerprint(directory)
+    cached = _banks.get(directory)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+
+    cache_path = os.path.join(directory, CACHE_FILE)
+    bank: TemplateBank | None = None
+    if fingerprint and os.path.exists(cache_path):
+        try:
+            bank, cached_fingerprint = TemplateBank.load(cache_path)
+            if cached_fingerprint != fingerprint:
+                bank = None
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            bank = None
+
+    if bank is None:
+        bank = TemplateBank.from_directory(directory)
+        if fingerprint:
+            try:
+                bank.save(cache_path, fingerprint)
+            except OSError:
+                pass  # каталог только для чтения — работаем без кэша
+
+    _banks[directory] = (fingerprint, bank)
+    return bank
@@ -0,0 +1,20 @@
+import cv2
+from cv2.typing import MatLike
+import numpy as np
+
+
+def generate_digit_template(digit: str, size: tuple[int, int] = (48, 32)) -> MatLike:
+    img = np.ones(size, dtype=np.uint8) * 255
+    # Используем шрифт, близкий к номерам — например, "Arial" или "Digital"
+    _ = cv2.putText(img, digit, (-2, 42), cv2.FONT_HERSHEY_DUPLEX, 1.8, (0, 0, 0), 2)
+    # _, img = cv2.threshold(img, 127, 255, cv2.THRESH_BINARY)
+    return img
+
+
+def generate_letter_template(letter: str, size: tuple[int, int] = (48, 32)) -> MatLike:
+    # Буквы шире цифр, поэтому рисуем на большом холсте и обрезаем по символу,
+    # как это делает CharSegmenter с реальными символами
+    canvas = np.ones((96, 96), dtype=np.uint8) * 255
+    _ = cv2.putText(canvas, letter, (8, 80), cv2.FONT_HERSHEY_DUPLEX, 2.4, (0, 0, 0), 2)
+    x, y, w, h = cv2.boundingRect(255 - canvas)
+    return cv2.resize(canvas[y:y + h, x:x + w], (size[1], size[0]))
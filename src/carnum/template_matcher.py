@@ -0,0 +1,66 @@
+from collections.abc import Sequence
+
+import cv2
+from cv2.typing import MatLike
+import numpy as np
+
+
+class TemplateMatcher:
+    """
+    Сравнение символов с банком шаблонов одним матричным умножением.
+
+    TM_CCOEFF_NORMED для окна размером с шаблон — это коэффициент корреляции,
+    поэтому шаблоны заранее центрируются и нормируются, а символы сравниваются
+    со всеми шаблонами сразу как скалярные произведения.
+    """
+    def __init__(self, templates: dict[str, MatLike], size: tuple[int, int] = (32, 48)) -> None:
+        self.chars: list[str] = list(templates)
+        self.size: tuple[int, int] = size
+
+        vectors = np.empty((len(self.chars), size[0] * size[1]), dtype=np.float64)
+        for i, tmpl in enumerate(templates.values()):
+            vectors[i] = cv2.resize(tmpl, size).reshape(-1)
+        self.matrix: np.ndarray = self.normalize(vectors)
+
+    @staticmethod
+    def normalize(vectors: np.ndarray) -> np.ndarray:
+        """
+        Центрирует строки и приводит их к единичной норме (нулевые строки остаются нулевыми)
+        """
+        centered = vectors - vectors.mean(axis=1, keepdims=True)
+        norms = np.linalg.norm(centered, axis=1, keepdims=True)
+        return np.divide(centered, norms, out=np.zeros_like(centered), where=norms > 0)
+
+    def vectorize(self, symbols: Sequence[MatLike]) -> np.ndarray:
+        vectors = np.empty((len(symbols), self.size[0] * self.size[1]), dtype=np.float64)
+        for i, symbol in enumerate(symbols):
+            vectors[i] = cv2.resize(symbol, self.size).reshape(-1)
+        return self.normalize(vectors)
+
+    def scores(self, symbols: Sequence[MatLike]) -> np.ndarray:
+        """
+        Матрица оценок (символ x шаблон)
+        """
+        return self.vectorize(symbols) @ self.matrix.T
+
+    def match(self, symbols: Sequence[MatLike]) -> list[str]:
+        if not self.chars:
+            return ['?'] * len(symbols)
+        if not symbols:
+            return []
+        best = np.argmax(self.scores(symbols), axis=1)
+        return [self.chars[i] for i in best]
+
+    def top_k(self, symbols: Sequence[MatLike], k: int = 3) -> list[list[tuple[str, float]]]:
+        """
+        k лучших шаблонов для каждого символа в порядке убывания оценки
+        """
+        if not self.chars or not symbols:
+            return [[] for _ in symbols]
+        scores = self.scores(symbols)
+        # Устойчивая сортировка: при равных оценках выигрывает первый шаблон, как в argmax
+        order = np.argsort(-scores, axis=1, kind='stable')[:, :k]
+        return [
+            [(self.chars[j], float(row_scores[j])) for j in row_order]
+            for row_scores, row_order in zip(scores, order)
+        ]
@@ -0,0 +1,33 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+
+# Пулы по числу потоков: один на процесс, создаются при первом обращении
+_pools: dict[int, ThreadPoolExecutor] = {}
+
+
+def default_threads() -> int:
+    return min(4, os.cpu_count() or 1)
+
+
+def shared_thread_pool(workers: int | None = None) -> ThreadPoolExecutor:
+    """
+    Общий пул потоков для параллельных этапов внутри одного изображения.
+
+    Вызовы OpenCV и ожидание подпроцесса Tesseract отпускают GIL, поэтому
+    потоки перекрывают эти этапы. Пул один на процесс (для каждого числа
+    потоков), чтобы конвейеры и распознаватели не создавали потоки на каждый вызов
+    """
+    workers = workers or default_threads()
+    pool = _pools.get(workers)
+    if pool is None:
+        pool = _pools[workers] = ThreadPoolExecutor(workers, thread_name_prefix=f'carnum-{workers}')
+    return pool
+
+
+def _forget_pools() -> None:
+    # Потоки не переживают fork: дочерний процесс (рабочий BatchRunner) создаст свои пулы
+    _pools.clear()
+
+
+os.register_at_fork(after_in_child=_forget_pools)
@@ -0,0 +1,215 @@
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, fields, replace
+from functools import lru_cache
+import csv
+import itertools
+import os
+import random
+from typing import Any
+
+import cv2
+from cv2.typing import MatLike
+
+from src.carnum.number_detector import NumberDetector
+from src.carnum.pipeline import Pipeline
+from src.carnum.pipeline_config import PipelineConfig
+from src.carnum.template_bank import get_template_bank
+
+
+# Пространство поиска по умолчанию: вокруг прежних зашитых значений
+DEFAULT_SPACE: dict[str, list[Any]] = {
+    'contrast_clip_limit': [2, 3, 4],
+    'contrast_kernel_size': [8],
+    'dilation_kernel_size': [3],
+    'canny_threshold1': [50, 100, 150],
+    'canny_threshold2': [150, 200, 250],
+    'min_contour_area': [500, 1000, 2000],
+    'block_size': [11, 13, 15],
+    'threshold_c': [3, 5, 7],
+}
+
+# Параметры, от которых зависят общие этапы: одинаковые значения — одинаковый кэш
+PREPROCESS_KEYS = ('contrast_clip_limit', 'contrast_kernel_size', 'target_img_width', 'target_img_height')
+EDGE_KEYS = ('canny_threshold1', 'canny_threshold2', 'dilation_kernel_size')
+
+_worker_pipelines: list[Pipeline] = []
+
+
+@dataclass
+class TrialResult:
+    config: PipelineConfig
+    plates_correct: int = 0
+    chars_correct: int = 0
+    chars_total: int = 0
+    images: int = 0
+
+    @property
+    def plate_accuracy(self) -> float:
+        return self.plates_correct / self.images if self.images else 0.0
+
+    @property
+    def char_accuracy(self) -> float:
+        return self.chars_correct / self.chars_total if self.chars_total else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'config': self.config.to_dict(),
+            'plate_accuracy': self.plate_accuracy,
+            'char_accuracy': self.char_accuracy,
+            'plates_correct': self.plates_correct,
+            'chars_correct': self.chars_correct,
+            'chars_total': self.chars_total,
+        }
+
+
+def load_labels(path: str) -> list[tuple[str, str]]:
+    """
+    CSV с колонками path и number (номер латиницей)
+    """
+    with open(path, encoding='utf-8', newline='') as f:
+        return [(row['path'], row['number']) for row in csv.DictReader(f)]
+
+
+def grid_configs(space: dict[str, Sequence[Any]], base: PipelineConfig | None = None) -> list[PipelineConfig]:
+    """
+    Все сочетания значений пространства поиска
+    """
+    base = base or PipelineConfig()
+    names = list(space)
+    return [replace(base, **dict(zip(names, values))) for values in itertools.product(*space.values())]
+
+
+def random_configs(
+    space: dict[str, Sequence[Any]],
+    trials: int,
+    seed: int | None = None,
+    base: PipelineConfig | None = None,
+) -> list[PipelineConfig]:
+    """
+    Случайные различные сочетания (не больше, чем есть в сетке)
+    """
+    base = base or PipelineConfig()
+    rng = random.Random(seed)
+    total = 1
+    for values in space.values():
+        total *= len(values)
+
+    seen: set[PipelineConfig] = set()
+    configs: list[PipelineConfig] = []
+    while len(configs) < min(trials, total):
+        config = replace(base, **{name: rng.choice(list(values)) for name, values in space.items()})
+        if config not in seen:
+            seen.add(config)
+            configs.append(config)
+    return configs
+
+
+def validate_space(space: dict[str, Sequence[Any]]) -> None:
+    known = {f.name for f in fields(PipelineConfig)}
+    unknown = set(space) - known
+    if unknown:
+        raise ValueError(f'unknown parameters: {", ".join(sorted(unknown))}')
+    if any(value % 2 == 0 or value < 3 for value in space.get('block_size', [])):
+        raise ValueError('block_size values must be odd and >= 3')
+
+
+def _stage_key(config: PipelineConfig, names: tuple[str, ...]) -> tuple[Any, ...]:
+    return tuple(getattr(config, name) for name in names)
+
+
+@lru_cache(maxsize=32)
+def _load_image(path: str) -> MatLike | None:
+    return cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+
+
+@lru_cache(maxsize=16)
+def _preprocessed(path: str, preprocess_key: tuple[Any, ...]) -> tuple[MatLike, float]:
+    """
+    CLAHE + билатеральный фильтр + масштаб: зависят только от PREPROCESS_KEYS
+    """
+    detector = NumberDetector(_load_image(path), **dict(zip(PREPROCESS_KEYS, preprocess_key)))
+    detector.preprocess()
+    return detector.img, detector.scale
+
+
+@lru_cache(maxsize=16)
+def _edges(path: str, preprocess_key: tuple[Any, ...], edge_key: tuple[Any, ...]) -> MatLike:
+    img, _ = _preprocessed(path, preprocess_key)
+    return NumberDetector(img, **dict(zip(EDGE_KEYS, edge_key))).find_edges(img)
+
+
+def read_number(path: str, pipeline: Pipeline) -> str:
+    """
+    Номер, который прочитает pipeline (тот же Pipeline, что загрузит подобранную
+    конфигурацию); улучшение контраста и границы берутся из кэша
+    """
+    img = _load_image(path)
+    if img is None:
+        return ''
+
+    config = pipeline.config
+    preprocess_key = _stage_key(config, PREPROCESS_KEYS)
+    img_preprocessed, scale = _preprocessed(path, preprocess_key)
+    edges = _edges(path, preprocess_key, _stage_key(config, EDGE_KEYS))
+    return pipeline.process(img, path, preprocessed=(img_preprocessed, scale, edges)).number or ''
+
+
+def _init_worker(configs: list[PipelineConfig], templates_dir: str, pipeline_params: dict[str, Any]) -> None:
+    global _worker_pipelines
+    cv2.setNumThreads(1)
+    templates = get_template_bank(templates_dir)
+    _worker_pipelines = [
+        Pipeline(templates=templates, config=config, collect_metrics=False, **pipeline_params) for config in configs
+    ]
+
+
+def _evaluate_image(path: str) -> list[str]:
+    """
+    Номер, прочитанный каждой конфигурацией на одном изображении
+    """
+    assert _worker_pipelines, 'worker is not initialized'
+    return [read_number(path, pipeline) for pipeline in _worker_pipelines]
+
+
+class ParameterTuner:
+    """
+    Подбор порогов детектора и сегментатора по размеченным изображениям.
+
+    Каждая конфигурация оценивается тем же Pipeline, который потом её загрузит:
+    pipeline_params (форматы, min_confidence, max_reads, normalizer, letter_backend)
+    должны совпадать с настройками, с которыми конфигурация будет работать.
+    Задача пула — одно изображение со всеми конфигурациями. Конфигурации
+    упорядочены по параметрам предобработки и границ, поэтому CLAHE и Canny
+    для одинаковых значений считаются один раз и берутся из кэша процесса
+    """
+    def __init__(
+        self,
+        labels: Iterable[tuple[str, str]],
+        workers: int | None = None,
+        templates_dir: str = 'img/templates',
+        **pipeline_params: Any,
+    ) -> None:
+        self.labels: list[tuple[str, str]] = list(labels)
+        self.workers: int = workers or os.cpu_count() or 1
+        self.templates_dir: str = templates_dir
+        self.pipeline_params: dict[str, Any] = pipeline_params
+
+    def run(self, configs: Sequence[PipelineConfig]) -> list[TrialResult]:
+        """
+        Результаты конфигураций от лучшей к худшей (по номерам, затем по символам)
+        """
+        configs = sorted(configs, key=lambda c: (_stage_key(c, PREPROCESS_KEYS), _stage_key(c, EDGE_KEYS)))
+        results = [TrialResult(config) for config in configs]
+
+        get_template_bank(self.templates_dir)
+        paths = [path for path, _ in self.labels]
+        with ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(configs, self.templates_dir, self.pipeline_params)) as executor:
+            for (_, expected), numbers in zip(self.labels, executor.map(_evaluate_image, paths)):
+                for result, number in zip(results, numbers):
+                    result.images += 1
+                    result.plates_correct += number == expected
+                    result.chars_correct += sum(p == e for p, e in zip(number, expected))
+                    result.chars_total += len(expected)
+
+        return sorted(results, key=lambda r: (r.plates_correct, r.chars_correct), reverse=True)
@@ -0,0 +1,231 @@
+from collections import Counter
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+import queue
+import threading
+from typing import Literal
+
+import cv2
+from cv2.typing import MatLike
+
+from src.carnum.bounding_box import BoundingBox
+from src.carnum.pipeline import Pipeline, PipelineResult
+from src.carnum.plate_format import is_valid_plate
+
+
+QueuePolicy = Literal['drop_oldest', 'block']
+
+
+class FrameQueue:
+    """
+    Ограниченная очередь кадров.
+
+    При policy='drop_oldest' переполнение вытесняет самый старый кадр (живой
+    поток не должен копить задержку), при 'block' читатель ждёт обработчика.
+    """
+    def __init__(self, maxsize: int = 8, policy: QueuePolicy = 'drop_oldest') -> None:
+        self.queue: queue.Queue[tuple[int, MatLike] | None] = queue.Queue(maxsize)
+        self.policy: QueuePolicy = policy
+        self.dropped: int = 0
+
+    def put(self, item: tuple[int, MatLike] | None) -> None:
+        if self.policy == 'block' or item is None:
+            self.queue.put(item)
+            return
+
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self) -> tuple[int, MatLike] | None:
+        return self.queue.get()
+
+
+class FrameReader(threading.Thread):
+    """
+    Читает кадры из cv2.VideoCapture-совместимого источника в FrameQueue
+    """
+    def __init__(self, source: str | int, frames: FrameQueue) -> None:
+        super().__init__(daemon=True)
+        self.source: str | int = source
+        self.frames: FrameQueue = frames
+        self.stopped: threading.Event = threading.Event()
+
+    def run(self) -> None:
+        capture = cv2.VideoCapture(self.source)
+        try:
+            index = 0
+            while not self.stopped.is_set():
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                self.frames.put((index, frame))
+                index += 1
+        finally:
+            capture.release()
+            self.frames.put(None)
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+
+@dataclass
+class PlateTrack:
+    track_id: int
+    bbox: BoundingBox
+    first_frame: int
+    last_frame: int
+    votes: Counter[str] = field(default_factory=Counter)
+
+    @property
+    def number(self) -> str:
+        return self.votes.most_common(1)[0][0] if self.votes else ''
+
+    def to_dict(self) -> dict:
+        return {
+            'track_id': self.track_id,
+            'number': self.number,
+            'votes': dict(self.votes),
+            'first_frame': self.first_frame,
+            'last_frame': self.last_frame,
+            'bbox': {'x': self.bbox.x, 'y': self.bbox.y, 'w': self.bbox.w, 'h': self.bbox.h},
+        }
+
+
+def iou(a: BoundingBox, b: BoundingBox) -> float:
+    w = min(a.x + a.w, b.x + b.w) - max(a.x, b.x)
+    h = min(a.y + a.h, b.y + b.h) - max(a.y, b.y)
+    if w <= 0 or h <= 0:
+        return 0.0
+    intersection = w * h
+    return intersection / float(a.w * a.h + b.w * b.h - intersection)
+
+
+class PlateTracker:
+    """
+    Сопоставляет найденные номера между кадрами по пересечению рамок
+    и накапливает голоса за прочитанный текст
+    """
+    def __init__(self, max_missed_frames: int = 15, iou_threshold: float = 0.3) -> None:
+        self.max_missed_frames: int = max_missed_frames
+        self.iou_threshold: float = iou_threshold
+        self.tracks: list[PlateTrack] = []
+        self.next_id: int = 0
+
+    def update(self, frame_index: int, bbox: BoundingBox, number: str) -> PlateTrack:
+        best: PlateTrack | None = None
+        best_iou = self.iou_threshold
+        for track in self.tracks:
+            overlap = iou(track.bbox, bbox)
+            if overlap >= best_iou:
+                best, best_iou = track, overlap
+
+        if best is None:
+            best = PlateTrack(self.next_id, bbox, frame_index, frame_index)
+            self.next_id += 1
+            self.tracks.append(best)
+
+        best.bbox = bbox
+        best.last_frame = frame_index
+        best.votes[number] += 1
+        return best
+
+    def expire(self, frame_index: int) -> list[PlateTrack]:
+        """
+        Убирает треки, которые давно не видели, и возвращает их
+        """
+        finished = [t for t in self.tracks if frame_index - t.last_frame > self.max_missed_frames]
+        self.tracks = [t for t in self.tracks if frame_index - t.last_frame <= self.max_missed_frames]
+        return finished
+
+    def flush(self) -> list[PlateTrack]:
+        finished, self.tracks = self.tracks, []
+        return finished
+
+    def search_region(self, frame_shape: tuple[int, ...], margin: float) -> BoundingBox | None:
+        """
+        Область поиска вокруг последнего обновлённого трека
+        """
+        if not self.tracks:
+            return None
+
+        bbox = max(self.tracks, key=lambda t: t.last_frame).bbox
+        frame_h, frame_w = frame_shape[:2]
+        dx, dy = int(bbox.w * margin), int(bbox.h * margin * 2)
+        x0, y0 = max(0, bbox.x - dx), max(0, bbox.y - dy)
+        x1, y1 = min(frame_w, bbox.x + bbox.w + dx), min(frame_h, bbox.y + bbox.h + dy)
+        return BoundingBox(x0, y0, x1 - x0, y1 - y0)
+
+
+class VideoPipeline:
+    """
+    Распознавание номеров в видеопотоке: пропуск кадров, поиск в окрестности
+    последнего найденного номера и один итоговый номер на трек
+    """
+    def __init__(
+        self,
+        pipeline: Pipeline,
+        frame_step: int = 1,
+        queue_size: int = 8,
+        queue_policy: QueuePolicy = 'drop_oldest',
+        roi_margin: float = 0.5,
+        max_missed_frames: int = 15,
+    ) -> None:
+        self.pipeline: Pipeline = pipeline
+        self.frame_step: int = max(1, frame_step)
+        self.queue_size: int = queue_size
+        self.queue_policy: QueuePolicy = queue_policy
+        self.roi_margin: float = roi_margin
+        self.tracker: PlateTracker = PlateTracker(max_missed_frames)
+        self.dropped_frames: int = 0
+
+    def run(self, source: str | int) -> Iterator[PlateTrack]:
+        """
+        Отдаёт завершённые треки по мере их завершения и оставшиеся в конце потока
+        """
+        frames = FrameQueue(self.queue_size, self.queue_policy)
+        reader = FrameReader(source, frames)
+        reader.start()
+
+        try:
+            while (item := frames.get()) is not None:
+                index, frame = item
+                if index % self.frame_step == 0:
+                    self.process_frame(index, frame)
+                yield from self.tracker.expire(index)
+        finally:
+            reader.stop()
+            self.dropped_frames = frames.dropped
+
+        yield from self.tracker.flush()
+
+    def process_frame(self, index: int, frame: MatLike) -> PlateTrack | None:
+        """
+        Окрестность последнего трека передаётся детектору областью интереса:
+        контуры ищутся в ней в полном разрешении и с оценкой по всему кадру,
+        рамка результата — в координатах кадра. Если кандидаты окрестности
+        не дали номера в формате, детектор сам продолжает поиском по всему кадру
+        (в пределах max_reads прочтений), поэтому кадр обрабатывается один раз.
+        В трек голосуют только номера в формате. С локализатором в Pipeline
+        кадр передаётся в цвете
+        """
+        if frame.ndim == 3 and self.pipeline.localizer is None:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        region = self.tracker.search_region(frame.shape, self.roi_margin)
+        result = self.pipeline.process(frame, rois=[region] if region is not None else None)
+
+        if result.bbox is None or not self.__valid(result):
+            return None
+        assert result.number is not None
+        return self.tracker.update(index, result.bbox, result.number)
+
+    def __valid(self, result: PipelineResult) -> bool:
+        return is_valid_plate(result.number, self.pipeline.formats)